@@ -17,7 +17,8 @@ You should have received a copy of the GNU General Public License
 along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
-from typing import Type
+import os
+from typing import Type, Dict, List
 from jerrycan.Config import Config as BaseConfig
 from bokkichat.connection.impl.TelegramBotConnection import \
     TelegramBotConnection
@@ -38,6 +39,127 @@ class Config(BaseConfig):
     Single Telegram bot connection used for all telegram communications
     """
 
+    ANILIST_FETCH_WORKERS: int = 4
+    """
+    The amount of threads used to fetch anilist user lists concurrently
+    """
+
+    CHAPTER_GUESS_REQUEST_BUDGET: int = 300
+    """
+    The maximum amount of anilist requests a single update of the manga
+    chapter guesses may use
+    """
+
+    CHAPTER_GUESS_COMMIT_SIZE: int = 100
+    """
+    The amount of updated manga chapter guesses that are committed to the
+    database at once
+    """
+
+    MANGADEX_BATCH_SIZE: int = 500
+    """
+    The amount of mangadex items that are processed at once while updating
+    the mangadex data
+    """
+
+    MANGADEX_FULL_SYNC_INTERVAL: int = 60 * 60 * 24 * 7
+    """
+    The amount of seconds after which the mangadex update fetches all
+    mangadex items instead of only the recently updated ones.
+    Set to 0 to always fetch all mangadex items.
+    """
+
+    MANGADEX_COVER_WORKERS: int = 4
+    """
+    The amount of threads used to resolve mangadex covers while the
+    mangadex data is being updated
+    """
+
+    MANGADEX_ENRICHMENT_WORKERS: int = 2
+    """
+    The amount of threads per service used to load anilist and myanimelist
+    data for manga referenced by mangadex
+    """
+
+    JIKAN_MAX_RETRIES: int = 4
+    """
+    How often failed or throttled requests to the jikan API are retried
+    """
+
+    JIKAN_MAX_BACKOFF: float = 60
+    """
+    The maximum amount of seconds to wait before retrying a request to the
+    jikan API
+    """
+
+    RESPONSE_CACHE_PATH: str = "/tmp/otaku_info-response-cache.db"
+    """
+    The path to the SQLite database that caches responses of external APIs.
+    The default path does not persist across restarts, the docker-compose
+    setup stores the cache in the 'cache' volume.
+    """
+
+    RESPONSE_CACHE_SIZE: int = 100000
+    """
+    The maximum amount of cached responses of external APIs.
+    Set to 0 to disable the response cache.
+    """
+
+    ANILIST_CACHE_TTL: int = 60 * 60 * 24
+    """
+    The amount of seconds anilist media information is cached
+    """
+
+    MYANIMELIST_CACHE_TTL: int = 60 * 60 * 24 * 7
+    """
+    The amount of seconds myanimelist media information is cached
+    """
+
+    MANGADEX_CACHE_TTL: int = 60 * 60 * 24
+    """
+    The amount of seconds mangadex media information is cached
+    """
+
+    NEGATIVE_CACHE_TTL: int = 60 * 60 * 24 * 3
+    """
+    The amount of seconds IDs that external APIs don't know are cached,
+    so that they aren't requested again on every update
+    """
+
+    LN_PARSE_WORKERS: int = 4
+    """
+    The amount of processes used to parse the reddit light novel release
+    wiki pages. If this is 1 or less, the pages are parsed in the
+    current process.
+    """
+
+    UPDATES_PAGE_SIZE: int = 60
+    """
+    The amount of updates that are displayed per page
+    """
+
+    HTTP_POOL_SIZE: int = 10
+    """
+    The maximum amount of keep-alive connections per host used for
+    requests to external services
+    """
+
+    HTTP_TIMEOUT: float = 30
+    """
+    The timeout in seconds for requests to external services
+    """
+
+    HTTP_RETRIES: int = 3
+    """
+    How often failed requests to external services are retried
+    """
+
+    HTTP_BACKOFF_FACTOR: float = 0.5
+    """
+    The backoff factor used for retrying failed requests to external services.
+    Retry n waits backoff_factor * 2^(n - 1) seconds.
+    """
+
     @classmethod
     def _load_extras(cls, parent: Type[BaseConfig]):
         """
@@ -49,3 +171,100 @@ class Config(BaseConfig):
         parent.TEMPLATE_EXTRAS.update({
             "profile": profile_extras
         })
+        cls.ANILIST_FETCH_WORKERS = int(os.environ.get(
+            "ANILIST_FETCH_WORKERS", cls.ANILIST_FETCH_WORKERS
+        ))
+        cls.CHAPTER_GUESS_REQUEST_BUDGET = int(os.environ.get(
+            "CHAPTER_GUESS_REQUEST_BUDGET", cls.CHAPTER_GUESS_REQUEST_BUDGET
+        ))
+        cls.CHAPTER_GUESS_COMMIT_SIZE = int(os.environ.get(
+            "CHAPTER_GUESS_COMMIT_SIZE", cls.CHAPTER_GUESS_COMMIT_SIZE
+        ))
+        cls.MANGADEX_BATCH_SIZE = int(os.environ.get(
+            "MANGADEX_BATCH_SIZE", cls.MANGADEX_BATCH_SIZE
+        ))
+        cls.MANGADEX_FULL_SYNC_INTERVAL = int(os.environ.get(
+            "MANGADEX_FULL_SYNC_INTERVAL", cls.MANGADEX_FULL_SYNC_INTERVAL
+        ))
+        cls.MANGADEX_COVER_WORKERS = int(os.environ.get(
+            "MANGADEX_COVER_WORKERS", cls.MANGADEX_COVER_WORKERS
+        ))
+        cls.MANGADEX_ENRICHMENT_WORKERS = int(os.environ.get(
+            "MANGADEX_ENRICHMENT_WORKERS", cls.MANGADEX_ENRICHMENT_WORKERS
+        ))
+        cls.JIKAN_MAX_RETRIES = int(os.environ.get(
+            "JIKAN_MAX_RETRIES", cls.JIKAN_MAX_RETRIES
+        ))
+        cls.JIKAN_MAX_BACKOFF = float(os.environ.get(
+            "JIKAN_MAX_BACKOFF", cls.JIKAN_MAX_BACKOFF
+        ))
+        cls.RESPONSE_CACHE_PATH = os.environ.get(
+            "RESPONSE_CACHE_PATH", cls.RESPONSE_CACHE_PATH
+        )
+        cls.RESPONSE_CACHE_SIZE = int(os.environ.get(
+            "RESPONSE_CACHE_SIZE", cls.RESPONSE_CACHE_SIZE
+        ))
+        cls.ANILIST_CACHE_TTL = int(os.environ.get(
+            "ANILIST_CACHE_TTL", cls.ANILIST_CACHE_TTL
+        ))
+        cls.MYANIMELIST_CACHE_TTL = int(os.environ.get(
+            "MYANIMELIST_CACHE_TTL", cls.MYANIMELIST_CACHE_TTL
+        ))
+        cls.MANGADEX_CACHE_TTL = int(os.environ.get(
+            "MANGADEX_CACHE_TTL", cls.MANGADEX_CACHE_TTL
+        ))
+        cls.NEGATIVE_CACHE_TTL = int(os.environ.get(
+            "NEGATIVE_CACHE_TTL", cls.NEGATIVE_CACHE_TTL
+        ))
+        cls.LN_PARSE_WORKERS = int(os.environ.get(
+            "LN_PARSE_WORKERS", cls.LN_PARSE_WORKERS
+        ))
+        cls.UPDATES_PAGE_SIZE = int(os.environ.get(
+            "UPDATES_PAGE_SIZE", cls.UPDATES_PAGE_SIZE
+        ))
+        cls.HTTP_POOL_SIZE = int(os.environ.get(
+            "HTTP_POOL_SIZE", cls.HTTP_POOL_SIZE
+        ))
+        cls.HTTP_TIMEOUT = float(os.environ.get(
+            "HTTP_TIMEOUT", cls.HTTP_TIMEOUT
+        ))
+        cls.HTTP_RETRIES = int(os.environ.get(
+            "HTTP_RETRIES", cls.HTTP_RETRIES
+        ))
+        cls.HTTP_BACKOFF_FACTOR = float(os.environ.get(
+            "HTTP_BACKOFF_FACTOR", cls.HTTP_BACKOFF_FACTOR
+        ))
+
+    @classmethod
+    def environment_variables(cls) -> Dict[str, List[str]]:
+        """
+        Specifies required and optional environment variables
+        :return: The specified environment variables in two lists in
+                 a dictionary, grouped by whether the variables are
+                 required or optional
+        """
+        variables = super().environment_variables()
+        variables["optional"] += [
+            "ANILIST_FETCH_WORKERS",
+            "CHAPTER_GUESS_REQUEST_BUDGET",
+            "CHAPTER_GUESS_COMMIT_SIZE",
+            "MANGADEX_BATCH_SIZE",
+            "MANGADEX_FULL_SYNC_INTERVAL",
+            "MANGADEX_COVER_WORKERS",
+            "MANGADEX_ENRICHMENT_WORKERS",
+            "JIKAN_MAX_RETRIES",
+            "JIKAN_MAX_BACKOFF",
+            "RESPONSE_CACHE_PATH",
+            "RESPONSE_CACHE_SIZE",
+            "ANILIST_CACHE_TTL",
+            "MYANIMELIST_CACHE_TTL",
+            "MANGADEX_CACHE_TTL",
+            "NEGATIVE_CACHE_TTL",
+            "LN_PARSE_WORKERS",
+            "UPDATES_PAGE_SIZE",
+            "HTTP_POOL_SIZE",
+            "HTTP_TIMEOUT",
+            "HTTP_RETRIES",
+            "HTTP_BACKOFF_FACTOR"
+        ]
+        return variables
@@ -17,23 +17,34 @@ You should have received a copy of the GNU General Public License
 along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
+import json
 import time
-from typing import List, Optional, Dict
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed
+from typing import List, Optional, Dict, Any, Tuple
 from jerrycan.base import app, db
 
-from otaku_info.db import MediaList, MediaListItem, MediaIdMapping
+from otaku_info.db import MediaList, MediaListItem, MediaIdMapping, \
+    MediaItem, MediaUserState, MediaUserStateFingerprint
+from otaku_info.Config import Config
 from otaku_info.enums import ListService, MediaType
 from otaku_info.utils.object_conversion import anime_list_item_to_media_item, \
     anilist_user_item_to_media_user_state
 from otaku_info.db.ServiceUsername import ServiceUsername
-from otaku_info.external.anilist import load_anilist
+from otaku_info.external.anilist import load_anilist_entries
 from otaku_info.external.entities.AnilistUserItem import AnilistUserItem
+from otaku_info.utils.db import upsert_entries
+from otaku_info.utils.update_feed import refresh_update_feed
 
 
 def update_anilist_data(usernames: Optional[List[ServiceUsername]] = None):
     """
     Retrieves all entries on the anilists of all users that provided
-    an anilist username
+    an anilist username.
+    The lists are fetched concurrently, the amount of threads can be
+    configured using Config.ANILIST_FETCH_WORKERS.
+    Every list is written to the database as soon as it has been fetched.
+    Entries that did not change since the last update are skipped.
     :param usernames: Can be used to override the usernames to use
     :return: None
     """
@@ -44,97 +55,156 @@ def update_anilist_data(usernames: Optional[List[ServiceUsername]] = None):
         usernames = ServiceUsername.query\
             .filter_by(service=ListService.ANILIST).all()
 
-    anilist_data: Dict[
-        ServiceUsername,
-        Dict[MediaType, List[AnilistUserItem]]
-    ] = {
-        username: {
-            media_type: load_anilist(username.username, media_type)
+    written, skipped = 0, 0
+    with ThreadPoolExecutor(
+            max_workers=Config.ANILIST_FETCH_WORKERS
+    ) as executor:
+        futures: Dict[Future, Tuple[ServiceUsername, MediaType]] = {
+            executor.submit(load_anilist_entries, username.username,
+                            media_type): (username, media_type)
+            for username in usernames
             for media_type in MediaType
         }
-        for username in usernames
-    }
-    __update_data(anilist_data)
-    app.logger.info(f"Finished Anilist Update in {time.time() - start}s.")
+        for future in as_completed(futures):
+            username, media_type = futures[future]
+            _written, _skipped = \
+                __update_data(username, media_type, future.result())
+            written += _written
+            skipped += _skipped
+
+    app.logger.info(f"Finished Anilist Update in {time.time() - start}s. "
+                    f"Wrote {written} changed entries, "
+                    f"skipped {skipped} unchanged entries.")
 
 
 def __update_data(
-        anilist_data: Dict[
-            ServiceUsername,
-            Dict[MediaType, List[AnilistUserItem]]
-        ]
-):
+        username: ServiceUsername,
+        media_type: MediaType,
+        anilist_entries: List[Dict[str, Any]]
+) -> Tuple[int, int]:
     """
-    Updates the anilist data in the database
-    :param anilist_data: The anilist data to enter
-    :return: None
+    Updates the anilist data of a single user list in the database.
+    Entries whose fingerprint matches the one stored in the database
+    are skipped. The update feed entries of the changed entries are
+    refreshed afterwards.
+    :param username: The service username the data belongs to
+    :param media_type: The media type of the list
+    :param anilist_entries: The raw anilist entries to enter
+    :return: The amount of written and skipped entries
     """
+    user_id = username.user_id
+    fingerprints: Dict[str, str] = {
+        x.service_id: x.fingerprint
+        for x in MediaUserStateFingerprint.query.filter_by(
+            service=ListService.ANILIST,
+            media_type=media_type,
+            user_id=user_id
+        ).all()
+    }
+
+    grouped_entries: Dict[str, List[Dict[str, Any]]] = {}
+    for entry in anilist_entries:
+        service_id = str(entry["media"]["id"])
+        grouped_entries.setdefault(service_id, []).append(entry)
+
+    changed_fingerprints = []
+    anilist_items = []
+    for service_id, entries in grouped_entries.items():
+        fingerprint = __generate_fingerprint(entries)
+        if fingerprints.get(service_id) == fingerprint:
+            continue
+        changed_fingerprints.append(MediaUserStateFingerprint(
+            service=ListService.ANILIST,
+            service_id=service_id,
+            media_type=media_type,
+            user_id=user_id,
+            fingerprint=fingerprint
+        ))
+        anilist_items += [
+            AnilistUserItem.from_query(media_type, entry)
+            for entry in entries
+        ]
+
     media_items = {}
     user_states = []
     user_lists = {}
     user_list_items = []
     mal_mappings = []
 
-    for username, anilist_info in anilist_data.items():
-        for media_type, anilist_items in anilist_info.items():
-            for anilist_item in anilist_items:
-                media_item = anime_list_item_to_media_item(anilist_item)
-                user_state = anilist_user_item_to_media_user_state(
-                    anilist_item, username.user_id
-                )
-                media_list = MediaList(
-                    service=ListService.ANILIST,
-                    media_type=anilist_item.media_type,
-                    user_id=username.user_id,
-                    name=anilist_item.list_name
-                )
-                media_list_item = MediaListItem(
-                    media_list_service=media_list.service,
-                    media_list_media_type=media_list.media_type,
-                    media_list_user_id=media_list.user_id,
-                    media_list_name=media_list.name,
-                    user_state_service=user_state.service,
-                    user_state_media_type=user_state.media_type,
-                    user_state_user_id=user_state.user_id,
-                    user_state_service_id=user_state.service_id
-                )
-                media_item_tuple = (
-                    media_item.service,
-                    media_item.service_id,
-                    media_item.media_type
-                )
-                media_list_tuple = (
-                    media_list.service,
-                    media_list.media_type,
-                    media_list.user_id,
-                    media_list.name
-                )
-                media_items[media_item_tuple] = media_item
-                user_states.append(user_state)
-                user_lists[media_list_tuple] = media_list
-                user_list_items.append(media_list_item)
-                if anilist_item.myanimelist_id is not None:
-                    mal_mapping = MediaIdMapping(
-                        service=ListService.MYANIMELIST,
-                        service_id=str(anilist_item.myanimelist_id),
-                        parent_service=ListService.ANILIST,
-                        parent_service_id=media_item.service_id,
-                        media_type=media_item.media_type
-                    )
-                    mal_mappings.append(mal_mapping)
-
-    for media_item in media_items.values():
-        app.logger.debug(f"Upserting anilist item {media_item.title}")
-        db.session.merge(media_item)
-    for user_state in user_states:
-        db.session.merge(user_state)
-    for media_list in user_lists.values():
-        db.session.merge(media_list)
-    for media_list_item in user_list_items:
-        db.session.merge(media_list_item)
-    for mal_mapping in mal_mappings:
-        db.session.merge(mal_mapping)
-        app.logger.debug(f"Upserting id mapping: "
-                         f"anilist:{mal_mapping.parent_service_id} "
-                         f"-> myanimelist:{mal_mapping.service_id}")
+    for anilist_item in anilist_items:
+        media_item = anime_list_item_to_media_item(anilist_item)
+        user_state = anilist_user_item_to_media_user_state(
+            anilist_item, user_id
+        )
+        media_list = MediaList(
+            service=ListService.ANILIST,
+            media_type=anilist_item.media_type,
+            user_id=user_id,
+            name=anilist_item.list_name
+        )
+        media_list_item = MediaListItem(
+            media_list_service=media_list.service,
+            media_list_media_type=media_list.media_type,
+            media_list_user_id=media_list.user_id,
+            media_list_name=media_list.name,
+            user_state_service=user_state.service,
+            user_state_media_type=user_state.media_type,
+            user_state_user_id=user_state.user_id,
+            user_state_service_id=user_state.service_id
+        )
+        media_item_tuple = (
+            media_item.service,
+            media_item.service_id,
+            media_item.media_type
+        )
+        media_list_tuple = (
+            media_list.service,
+            media_list.media_type,
+            media_list.user_id,
+            media_list.name
+        )
+        media_items[media_item_tuple] = media_item
+        user_states.append(user_state)
+        user_lists[media_list_tuple] = media_list
+        user_list_items.append(media_list_item)
+        if anilist_item.myanimelist_id is not None:
+            mal_mapping = MediaIdMapping(
+                service=ListService.MYANIMELIST,
+                service_id=str(anilist_item.myanimelist_id),
+                parent_service=ListService.ANILIST,
+                parent_service_id=media_item.service_id,
+                media_type=media_item.media_type
+            )
+            mal_mappings.append(mal_mapping)
+
+    app.logger.debug(f"Upserting {len(media_items)} anilist items, "
+                     f"{len(user_states)} user states, "
+                     f"{len(user_lists)} lists, "
+                     f"{len(user_list_items)} list items and "
+                     f"{len(mal_mappings)} id mappings")
+    upsert_entries(MediaItem, list(media_items.values()))
+    upsert_entries(MediaUserState, user_states)
+    upsert_entries(MediaList, list(user_lists.values()))
+    upsert_entries(MediaListItem, user_list_items)
+    upsert_entries(MediaIdMapping, mal_mappings)
+    upsert_entries(MediaUserStateFingerprint, changed_fingerprints)
+    db.session.commit()
+
+    refresh_update_feed(media_items.keys())
     db.session.commit()
+
+    written = len(changed_fingerprints)
+    return written, len(grouped_entries) - written
+
+
+def __generate_fingerprint(entries: List[Dict[str, Any]]) -> str:
+    """
+    Generates a fingerprint for the raw anilist entries of a media item.
+    A media item may have multiple entries if it's part of multiple lists.
+    The fingerprint covers both the user's data and the media's data.
+    :param entries: The raw anilist entries
+    :return: The fingerprint
+    """
+    entries = sorted(entries, key=lambda x: x["list_name"])
+    serialized = json.dumps(entries, sort_keys=True)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
@@ -18,51 +18,155 @@ along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
 import time
-from typing import List
+from typing import List, Dict, Optional, Set, Tuple
+from sqlalchemy import func, exists, and_
+from sqlalchemy.orm import joinedload
 from jerrycan.base import db, app
+from otaku_info.Config import Config
 from otaku_info.db.MediaUserState import MediaUserState
 from otaku_info.db.MangaChapterGuess import MangaChapterGuess
-from otaku_info.enums import MediaType, ListService
-from otaku_info.external.anilist import guess_latest_manga_chapter
+from otaku_info.db.MangaChapterGuessHistory import MangaChapterGuessHistory
+from otaku_info.enums import MediaType, ListService, ConsumingState
+from otaku_info.external.anilist import guess_latest_manga_chapters, \
+    ANILIST_ACTIVITY_BATCH_SIZE
+from otaku_info.utils.ChapterGuessScheduler import ChapterGuessScheduler
+from otaku_info.utils.update_feed import refresh_update_feed
 
 
 def update_anilist_manga_chapter_guesses():
     """
-    Updates the manga chapter guesses for anilist items
+    Updates the manga chapter guesses for anilist items.
+    The guesses are updated in order of their priority until the request
+    budget specified by Config.CHAPTER_GUESS_REQUEST_BUDGET is used up.
     :return: None
     """
     start = time.time()
     app.logger.info("Starting update of manga chapter guesses")
 
+    __create_missing_guesses()
+
     guesses: List[MangaChapterGuess] = MangaChapterGuess.query.filter_by(
         service=ListService.ANILIST
+    ).options(
+        joinedload(MangaChapterGuess.media_item),
+        joinedload(MangaChapterGuess.history)
     ).all()
-    existing_ids = [x.service_id for x in guesses]
 
-    anilist_items: List[MediaUserState] = MediaUserState.query.filter_by(
-        service=ListService.ANILIST, media_type=MediaType.MANGA
-    ).all()
+    current_readers: Dict[str, int] = dict(
+        db.session.query(MediaUserState.service_id, func.count())
+        .filter_by(
+            service=ListService.ANILIST,
+            media_type=MediaType.MANGA,
+            consuming_state=ConsumingState.CURRENT
+        ).group_by(MediaUserState.service_id).all()
+    )
 
-    for item in anilist_items:
-        if item.service_id not in existing_ids:
-            new_guess = MangaChapterGuess(
-                service=item.service,
-                service_id=item.service_id,
-                media_type=item.media_type
-            )
-            new_guess = db.session.merge(new_guess)
-            guesses.append(new_guess)
-            existing_ids.append(item.service_id)
+    scheduler = ChapterGuessScheduler()
+    for guess in guesses:
+        scheduler.push(
+            guess,
+            guess.media_item.releasing_state,
+            current_readers.get(guess.service_id, 0),
+            guess.history
+        )
+    budget = Config.CHAPTER_GUESS_REQUEST_BUDGET * ANILIST_ACTIVITY_BATCH_SIZE
+    scheduled = scheduler.pop(budget)
+    app.logger.info(f"Updating {len(scheduled)} of {len(guesses)} "
+                    f"manga chapter guesses")
 
-    db.session.commit()
+    # Every commit acts as a checkpoint: Committed guesses have a recent
+    # last_update value, so the scheduler skips them if the job is
+    # interrupted and restarted.
+    uncommitted = 0
+    changed: Set[Tuple[ListService, str, MediaType]] = set()
+    try:
+        for i in range(0, len(scheduled), ANILIST_ACTIVITY_BATCH_SIZE):
+            batch = scheduled[i:i + ANILIST_ACTIVITY_BATCH_SIZE]
+            app.logger.debug(f"Updating chapter guesses for "
+                             f"{[x.service_id for x in batch]}")
+            results = guess_latest_manga_chapters(
+                [int(guess.service_id) for guess in batch]
+            )
+            for guess in batch:
+                # Guesses whose query failed keep their previous value and
+                # are retried during the next update
+                anilist_id = int(guess.service_id)
+                if anilist_id not in results:
+                    continue
+                if __update_guess(guess, results[anilist_id]):
+                    changed.add(
+                        (guess.service, guess.service_id, guess.media_type)
+                    )
+            uncommitted += len(batch)
 
-    for guess in guesses:
-        app.logger.debug(f"Updating chapter guess for {guess.service_id}")
-        delta = time.time() - guess.last_update
-        if delta > 60 * 60:
-            guess.last_update = int(time.time())
-            guess.guess = guess_latest_manga_chapter(int(guess.service_id))
+            if uncommitted >= Config.CHAPTER_GUESS_COMMIT_SIZE:
+                refresh_update_feed(changed)
+                db.session.commit()
+                uncommitted = 0
+                changed = set()
+    finally:
+        if db.session.is_active:
+            refresh_update_feed(changed)
             db.session.commit()
 
     app.logger.info(f"Finished updating manga chapter guesses "
                     f"in {time.time() - start}")
+
+
+def __update_guess(
+        guess: MangaChapterGuess,
+        new_guess: Optional[int]
+) -> bool:
+    """
+    Updates a chapter guess and keeps track of its change history
+    :param guess: The chapter guess to update
+    :param new_guess: The new guessed chapter number
+    :return: Whether the guessed chapter number changed
+    """
+    now = int(time.time())
+    if guess.history is None:
+        guess.history = MangaChapterGuessHistory(
+            service=guess.service,
+            service_id=guess.service_id,
+            media_type=guess.media_type,
+            first_update=now,
+            last_change=now,
+            change_count=0
+        )
+    elif guess.guess is not None and new_guess is not None \
+            and guess.guess != new_guess:
+        guess.history.change_count += 1
+        guess.history.last_change = now
+
+    changed = guess.guess != new_guess
+    guess.last_update = now
+    guess.guess = new_guess
+    return changed
+
+
+def __create_missing_guesses():
+    """
+    Creates chapter guesses for all anilist manga that are tracked by at
+    least one user but don't have a chapter guess yet.
+    This is done using a single INSERT ... SELECT statement that selects the
+    distinct media IDs without chapter guesses using an anti-join.
+    :return: None
+    """
+    missing = db.session.query(
+        MediaUserState.service,
+        MediaUserState.service_id,
+        MediaUserState.media_type
+    ).filter(
+        MediaUserState.service == ListService.ANILIST,
+        MediaUserState.media_type == MediaType.MANGA,
+        ~exists().where(and_(
+            MangaChapterGuess.service == MediaUserState.service,
+            MangaChapterGuess.service_id == MediaUserState.service_id,
+            MangaChapterGuess.media_type == MediaUserState.media_type
+        ))
+    ).distinct()
+
+    db.session.execute(MangaChapterGuess.__table__.insert().from_select(
+        ["service", "service_id", "media_type"], missing.statement
+    ))
+    db.session.commit()
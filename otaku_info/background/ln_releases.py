@@ -18,106 +18,210 @@ along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
 import time
-from typing import Dict
+from typing import Dict, List, Tuple
 from jerrycan.base import app, db
-from otaku_info.db import MediaIdMapping
+from otaku_info.db import MediaIdMapping, LnRelease
 from otaku_info.db.MediaItem import MediaItem
 from otaku_info.enums import ListService, MediaType
 from otaku_info.external.reddit import load_ln_releases
 from otaku_info.utils.object_conversion import anime_list_item_to_media_item, \
     reddit_ln_release_to_ln_release
 from otaku_info.external.myanimelist import load_myanimelist_item
-from otaku_info.external.anilist import load_anilist_info
+from otaku_info.external.anilist import load_anilist_infos
+from otaku_info.utils.db import upsert_entries, MAX_BOUND_PARAMETERS
+from otaku_info.utils.update_feed import refresh_update_feed
 
 
 def update_ln_releases():
     """
-    Updates the light novel releases
+    Updates the light novel releases.
+    The update runs in phases: The releases are loaded from reddit, the
+    referenced myanimelist series are deduplicated and looked up in the
+    database in batches, missing series are loaded from myanimelist and
+    anilist, and finally all media items, ID mappings and releases are
+    written using bulk upserts and a single commit. Afterwards, the update
+    feed entries of all series with releases are refreshed, which also
+    picks up releases whose release date has passed since the last update.
     :return: None
     """
     start = time.time()
     app.logger.info("Starting Reddit LN Update")
 
-    existing_myanimelist_items: Dict[int, MediaItem] = {
-        int(x.service_id): x
-        for x in MediaItem.query.filter_by(
-            service=ListService.MYANIMELIST
-        ).options(db.joinedload(MediaItem.id_mappings)).all()
-    }
-    existing_anilist_items: Dict[int, MediaItem] = {
-        int(x.service_id): x
-        for x in MediaItem.query.filter_by(
-            service=ListService.ANILIST
-        ).options(db.joinedload(MediaItem.id_mappings)).all()
-    }
-    myanimelist_anilist_items = {}
-    for anilist_id, anilist_item in existing_anilist_items.items():
-        mal_mapping = anilist_item.ids.get(ListService.MYANIMELIST)
-        if mal_mapping is not None:
-            mal_id = int(mal_mapping.service_id)
-            myanimelist_anilist_items[mal_id] = anilist_item
-
+    phase_start = time.time()
     ln_releases = load_ln_releases()
+    myanimelist_ids = sorted({
+        x.myanimelist_id for x in ln_releases if x.myanimelist_id is not None
+    })
+    app.logger.info(
+        f"Loaded {len(ln_releases)} ln releases referencing "
+        f"{len(myanimelist_ids)} myanimelist series "
+        f"in {time.time() - phase_start:.2f}s"
+    )
+
+    phase_start = time.time()
+    myanimelist_items, anilist_items = __load_existing_items(myanimelist_ids)
+    app.logger.info(
+        f"Found {len(myanimelist_items)} myanimelist and "
+        f"{len(anilist_items)} anilist items in the database "
+        f"in {time.time() - phase_start:.2f}s"
+    )
+
+    phase_start = time.time()
+    new_items = __load_missing_items(
+        myanimelist_ids, myanimelist_items, anilist_items
+    )
+    app.logger.info(
+        f"Loaded {len(new_items)} missing media items "
+        f"in {time.time() - phase_start:.2f}s"
+    )
+
+    phase_start = time.time()
+    id_mappings: List[MediaIdMapping] = []
+    for myanimelist_id, anilist_item in anilist_items.items():
+        id_mappings.append(__generate_id_mapping(
+            anilist_item, ListService.MYANIMELIST, str(myanimelist_id)
+        ))
+        myanimelist_item = myanimelist_items.get(myanimelist_id)
+        if myanimelist_item is not None:
+            id_mappings.append(__generate_id_mapping(
+                myanimelist_item, ListService.ANILIST, anilist_item.service_id
+            ))
+
+    releases: List[LnRelease] = []
     for ln_release in ln_releases:
-
-        items = []
-        if ln_release.myanimelist_id is not None:
-            mal_id = ln_release.myanimelist_id
-            mal_item = existing_myanimelist_items.get(mal_id)
-            anilist_item = myanimelist_anilist_items.get(mal_id)
-
-            if mal_item is None:
-                mal_info = load_myanimelist_item(mal_id, MediaType.MANGA)
-                if mal_info is not None:
-                    mal_item = anime_list_item_to_media_item(mal_info)
-                    app.logger.debug(
-                        f"Upserting myanimelist: {mal_item.english_title}"
-                    )
-                    mal_item = db.session.merge(mal_item)
-                    existing_myanimelist_items[mal_id] = mal_item
-            if anilist_item is None:
-                anilist_info = load_anilist_info(
-                    int(mal_id), MediaType.MANGA, ListService.MYANIMELIST
-                )
-                if anilist_info is not None:
-                    anilist_item = anime_list_item_to_media_item(anilist_info)
-                    app.logger.debug(
-                        f"Upserting anilist: {anilist_item.english_title}"
-                    )
-                    anilist_item = db.session.merge(anilist_item)
-                    myanimelist_anilist_items[mal_id] = anilist_item
-
-            if anilist_item is not None and mal_item is not None:
-                for one, two in [
-                    (anilist_item, mal_item),
-                    (mal_item, anilist_item)
-                ]:
-                    app.logger.debug(
-                        f"Upserting mapping: "
-                        f"{one.service.value}:{one.service_id}"
-                        f"->{two.service.value}:{two.service_id}"
-                    )
-                    db.session.merge(MediaIdMapping(
-                        service=one.service,
-                        service_id=one.service_id,
-                        media_type=one.media_type,
-                        parent_service=two.service,
-                        parent_service_id=two.service_id
-                    ))
-            items += [x for x in [anilist_item, mal_item] if x is not None]
-
+        items = [
+            x.get(ln_release.myanimelist_id)
+            for x in [anilist_items, myanimelist_items]
+        ]
+        items = [x for x in items if x is not None]
         if len(items) == 0:
             items = [None]
-
-        app.logger.debug(
-            f"Upserting ln releases: {ln_release.series_name} "
-            f"volume {ln_release.volume}"
-        )
         for item in items:
-            release = reddit_ln_release_to_ln_release(ln_release, item)
+            releases.append(reddit_ln_release_to_ln_release(ln_release, item))
+
+    upsert_entries(MediaItem, new_items)
+    upsert_entries(MediaIdMapping, id_mappings)
+    upsert_entries(LnRelease, releases)
+    db.session.commit()
+    app.logger.info(
+        f"Upserted {len(new_items)} media items, {len(id_mappings)} "
+        f"ID mappings and {len(releases)} ln releases "
+        f"in {time.time() - phase_start:.2f}s"
+    )
+
+    phase_start = time.time()
+    refreshed = refresh_update_feed({
+        (x.service, x.service_id, x.media_type)
+        for x in releases if x.service is not None
+    })
+    db.session.commit()
+    app.logger.info(
+        f"Refreshed {refreshed} update feed entries "
+        f"in {time.time() - phase_start:.2f}s"
+    )
 
-            db.session.merge(release)
+    app.logger.info(f"Finished Reddit LN Update in {time.time() - start}s.")
 
-        db.session.commit()
 
-    app.logger.info(f"Finished Reddit LN Update in {time.time() - start}s.")
+def __load_existing_items(
+        myanimelist_ids: List[int]
+) -> Tuple[Dict[int, MediaItem], Dict[int, MediaItem]]:
+    """
+    Loads the myanimelist items with the given IDs and the anilist items
+    mapped to them from the database, using batched IN queries
+    :param myanimelist_ids: The myanimelist IDs
+    :return: The myanimelist items and the anilist items,
+             both mapped to their myanimelist IDs
+    """
+    service_ids = [str(x) for x in myanimelist_ids]
+    myanimelist_items: Dict[int, MediaItem] = {}
+    anilist_items: Dict[int, MediaItem] = {}
+
+    for i in range(0, len(service_ids), MAX_BOUND_PARAMETERS):
+        chunk = service_ids[i:i + MAX_BOUND_PARAMETERS]
+        for item in MediaItem.query.filter(
+                MediaItem.service == ListService.MYANIMELIST,
+                MediaItem.media_type == MediaType.MANGA,
+                MediaItem.service_id.in_(chunk)
+        ).all():
+            myanimelist_items[int(item.service_id)] = item
+
+        for service_id, item in db.session.query(
+                MediaIdMapping.service_id, MediaItem
+        ).join(MediaIdMapping.media_item).filter(
+            MediaIdMapping.service == ListService.MYANIMELIST,
+            MediaIdMapping.parent_service == ListService.ANILIST,
+            MediaIdMapping.media_type == MediaType.MANGA,
+            MediaIdMapping.service_id.in_(chunk)
+        ).all():
+            anilist_items[int(service_id)] = item
+
+    return myanimelist_items, anilist_items
+
+
+def __load_missing_items(
+        myanimelist_ids: List[int],
+        myanimelist_items: Dict[int, MediaItem],
+        anilist_items: Dict[int, MediaItem]
+) -> List[MediaItem]:
+    """
+    Loads the myanimelist and anilist items that don't exist in the
+    database yet. Every series is only loaded once, anilist items are
+    loaded in batches.
+    :param myanimelist_ids: The myanimelist IDs of all series
+    :param myanimelist_items: The existing myanimelist items, mapped to
+                              their myanimelist IDs.
+                              Newly loaded items are added.
+    :param anilist_items: The existing anilist items, mapped to
+                          myanimelist IDs. Newly loaded items are added.
+    :return: The newly loaded media items
+    """
+    new_items: List[MediaItem] = []
+
+    missing_anilist_ids = \
+        [x for x in myanimelist_ids if x not in anilist_items]
+    app.logger.debug(f"Loading {len(missing_anilist_ids)} anilist items")
+    anilist_infos = load_anilist_infos(
+        missing_anilist_ids, MediaType.MANGA, ListService.MYANIMELIST
+    )
+    for myanimelist_id, anilist_info in anilist_infos.items():
+        item = anime_list_item_to_media_item(anilist_info)
+        anilist_items[myanimelist_id] = item
+        new_items.append(item)
+
+    missing_myanimelist_ids = \
+        [x for x in myanimelist_ids if x not in myanimelist_items]
+    app.logger.debug(
+        f"Loading {len(missing_myanimelist_ids)} myanimelist items"
+    )
+    for myanimelist_id in missing_myanimelist_ids:
+        myanimelist_info = \
+            load_myanimelist_item(myanimelist_id, MediaType.MANGA)
+        if myanimelist_info is not None:
+            item = anime_list_item_to_media_item(myanimelist_info)
+            myanimelist_items[myanimelist_id] = item
+            new_items.append(item)
+
+    return new_items
+
+
+def __generate_id_mapping(
+        parent: MediaItem,
+        service: ListService,
+        service_id: str
+) -> MediaIdMapping:
+    """
+    Generates an ID mapping that links a media item to its ID on another
+    service
+    :param parent: The media item
+    :param service: The other service
+    :param service_id: The ID on the other service
+    :return: The ID mapping
+    """
+    return MediaIdMapping(
+        service=service,
+        service_id=service_id,
+        media_type=parent.media_type,
+        parent_service=parent.service,
+        parent_service_id=parent.service_id
+    )
@@ -18,106 +18,413 @@ along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
 import time
-from typing import Optional, List, Tuple
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed
+from typing import Optional, List, Tuple, Dict, Set
 from jerrycan.base import app, db
+from otaku_info.Config import Config
 from otaku_info.db.MediaItem import MediaItem
+from otaku_info.db.MangadexCover import MangadexCover
 from otaku_info.db.MediaIdMapping import MediaIdMapping
+from otaku_info.db.SyncWatermark import SyncWatermark
+from otaku_info.db.UnresolvedMangadexReference import \
+    UnresolvedMangadexReference
 from otaku_info.enums import ListService, MediaType
 from otaku_info.external.entities.AnimeListItem import AnimeListItem
 from otaku_info.external.entities.MangadexItem import MangadexItem
 from otaku_info.external.mangadex import fetch_all_mangadex_items
-from otaku_info.external.anilist import load_anilist_info
-from otaku_info.external.myanimelist import load_myanimelist_item
+from otaku_info.external.anilist import load_anilist_infos, \
+    ANILIST_PAGE_SIZE
+from otaku_info.external.myanimelist import load_myanimelist_item, \
+    jikan_client
 from otaku_info.utils.object_conversion import anime_list_item_to_media_item, \
     mangadex_item_to_media_item
+from otaku_info.utils.db import upsert_entries, MAX_BOUND_PARAMETERS
 
 
-def update_mangadex_data():
+def update_mangadex_data(full_sync: bool = False):
     """
     Loads the newest mangadex information and updates the mangadex entries in
     the database.
+    By default, only the mangadex items that were updated since the last
+    successful update are fetched. If no update was completed yet, a full
+    sync is requested or the last full sync is older than
+    Config.MANGADEX_FULL_SYNC_INTERVAL seconds, all mangadex items are
+    fetched.
+    The mangadex items are streamed from the API and processed in batches of
+    Config.MANGADEX_BATCH_SIZE items.
+    Anilist and myanimelist manga that are referenced by mangadex items but
+    don't exist in the database yet are loaded afterwards in a separate
+    enrichment stage. Manga that could not be loaded are stored and loading
+    them is retried during the next update.
+    :param full_sync: Whether to fetch all mangadex items
     :return: None
     """
     start_time = time.time()
-    app.logger.info("Starting Mangadex Update")
-
-    _existing_items = MediaItem.query.all()
-    existing_items = {
-        service: {
-            x.service_id: x
-            for x in _existing_items
-            if x.service == service
-        }
-        for service in ListService
-    }
-    fetched_items = fetch_all_mangadex_items()
+    watermark: Optional[SyncWatermark] = \
+        SyncWatermark.query.get(ListService.MANGADEX)
+    updated_since: Optional[int] = None
+    if watermark is not None and not full_sync \
+            and watermark.last_full_sync is not None \
+            and start_time - watermark.last_full_sync \
+            < Config.MANGADEX_FULL_SYNC_INTERVAL:
+        updated_since = watermark.timestamp
+    mode = "full" if updated_since is None else "incremental"
+    app.logger.info(f"Starting Mangadex Update ({mode})")
 
-    mangadex_items: List[Tuple[MediaItem, MangadexItem]] = []
-    for mangadex_item in fetched_items:
-        media_item = mangadex_item_to_media_item(mangadex_item)
-        app.logger.debug(f"Upserting mangadex item {media_item.english_title}")
-        media_item = db.session.merge(media_item)
-        __add_id_mappings(media_item, mangadex_item)
-        mangadex_items.append((media_item, mangadex_item))
+    known_covers: Dict[str, str] = dict(
+        db.session.query(MangadexCover.cover_id, MangadexCover.filename).all()
+    )
+    fetched_items = fetch_all_mangadex_items(updated_since, known_covers)
+
+    missing = __load_unresolved_references()
+    total = 0
+    while True:
+        batch = list(islice(fetched_items, Config.MANGADEX_BATCH_SIZE))
+        if len(batch) == 0:
+            break
+        __update_batch(batch, missing)
+        __store_covers(batch, known_covers)
+        total += len(batch)
+    app.logger.info(f"Fetched {total} mangadex items in "
+                    f"{time.time() - start_time}s.")
+
+    resolved = __enrich_missing_items(missing)
+    __store_unresolved_references({
+        key: ids for key, ids in missing.items() if key not in resolved
+    })
+
+    new_watermark = SyncWatermark(
+        service=ListService.MANGADEX, timestamp=int(start_time)
+    )
+    if updated_since is None:
+        new_watermark.last_full_sync = int(start_time)
+    upsert_entries(SyncWatermark, [new_watermark])
     db.session.commit()
 
-    for media_item, mangadex_item in mangadex_items:
+    app.logger.info(f"Finished Mangadex Update in "
+                    f"{time.time() - start_time}s. "
+                    f"Processed {total} mangadex items, "
+                    f"created {len(resolved)} of {len(missing)} "
+                    f"missing items.")
+    app.logger.info(f"Jikan metrics: {jikan_client.metrics()}")
 
-        for service in [ListService.ANILIST, ListService.MYANIMELIST]:
 
-            service_id = mangadex_item.external_ids.get(service)
-            existing = existing_items[service].get(service_id)
+def __update_batch(
+        fetched_items: List[MangadexItem],
+        missing: Dict[Tuple[ListService, str], List[Dict[ListService, str]]]
+):
+    """
+    Updates the database entries for a batch of mangadex items
+    :param fetched_items: The mangadex items to process
+    :param missing: Keeps track of the anilist and myanimelist manga that
+                    don't exist in the database yet, together with the
+                    IDs of the mangadex items that reference them.
+                    Missing manga referenced by this batch are added.
+    :return: None
+    """
+    media_items: List[MediaItem] = []
+    id_mappings: List[MediaIdMapping] = []
+    for mangadex_item in fetched_items:
+        media_item = mangadex_item_to_media_item(mangadex_item)
+        id_mappings += __generate_id_mappings(
+            media_item.service,
+            media_item.service_id,
+            __mangadex_ids(mangadex_item)
+        )
+        media_items.append(media_item)
 
+    existing_keys = __load_existing_keys({
+        (service, mangadex_item.external_ids[service])
+        for mangadex_item in fetched_items
+        for service in [ListService.ANILIST, ListService.MYANIMELIST]
+        if service in mangadex_item.external_ids
+    })
+    for mangadex_item in fetched_items:
+        for service in [ListService.ANILIST, ListService.MYANIMELIST]:
+            service_id = mangadex_item.external_ids.get(service)
             if service_id is None:
                 continue
-            if existing is not None:
-                __add_id_mappings(existing, mangadex_item)
-                continue
-
-            data: Optional[AnimeListItem] = None
-            if service == ListService.ANILIST:
-                data = load_anilist_info(
-                    int(service_id), MediaType.MANGA
+            elif (service, service_id) in existing_keys:
+                id_mappings += __generate_id_mappings(
+                    service, service_id, __mangadex_ids(mangadex_item)
                 )
-            elif service == ListService.MYANIMELIST:
-                data = load_myanimelist_item(
-                    int(service_id), MediaType.MANGA
+            else:
+                missing.setdefault((service, service_id), [])\
+                    .append(__mangadex_ids(mangadex_item))
+
+    app.logger.debug(f"Upserting {len(media_items)} mangadex items")
+    upsert_entries(MediaItem, media_items)
+    upsert_entries(MediaIdMapping, id_mappings)
+    db.session.commit()
+
+
+def __load_unresolved_references() \
+        -> Dict[Tuple[ListService, str], List[Dict[ListService, str]]]:
+    """
+    Loads the anilist and myanimelist manga that could not be loaded during
+    previous mangadex updates, together with the IDs of the mangadex items
+    that reference them.
+    The IDs of the mangadex items are loaded from their ID mappings.
+    Manga that were stored in the meantime are mapped to the mangadex items
+    right away.
+    :return: The unresolved manga and the IDs of the mangadex items that
+             reference them
+    """
+    references: List[UnresolvedMangadexReference] = \
+        UnresolvedMangadexReference.query.all()
+    mangadex_ids = sorted({x.mangadex_id for x in references})
+
+    ids: Dict[str, Dict[ListService, str]] = {
+        mangadex_id: {ListService.MANGADEX: mangadex_id}
+        for mangadex_id in mangadex_ids
+    }
+    for i in range(0, len(mangadex_ids), MAX_BOUND_PARAMETERS):
+        for mapping in MediaIdMapping.query.filter(
+                MediaIdMapping.parent_service == ListService.MANGADEX,
+                MediaIdMapping.media_type == MediaType.MANGA,
+                MediaIdMapping.parent_service_id.in_(
+                    mangadex_ids[i:i + MAX_BOUND_PARAMETERS]
                 )
-            if data is not None:
-                anime_item = anime_list_item_to_media_item(data)
-                title = anime_item.title
-                app.logger.debug(f"Upserting {service.value} item {title}")
-                anime_item = db.session.merge(anime_item)
-                existing_items[service][service_id] = anime_item
-                __add_id_mappings(anime_item, mangadex_item)
-        db.session.commit()
+        ).all():
+            ids[mapping.parent_service_id][mapping.service] = \
+                mapping.service_id
 
-    app.logger.info(f"Finished Mangadex Update in "
-                    f"{time.time() - start_time}s.")
+    existing_keys = __load_existing_keys({
+        (x.service, x.service_id) for x in references
+    })
+    missing: Dict[Tuple[ListService, str], List[Dict[ListService, str]]] = {}
+    id_mappings: List[MediaIdMapping] = []
+    for reference in references:
+        key = (reference.service, reference.service_id)
+        if key in existing_keys:
+            id_mappings += __generate_id_mappings(
+                reference.service,
+                reference.service_id,
+                ids[reference.mangadex_id]
+            )
+        else:
+            missing.setdefault(key, []).append(ids[reference.mangadex_id])
+
+    upsert_entries(MediaIdMapping, id_mappings)
+    db.session.commit()
+    app.logger.info(f"Retrying {len(missing)} unresolved items")
+    return missing
 
 
-def __add_id_mappings(media_item: MediaItem, mangadex_item: MangadexItem):
+def __store_unresolved_references(
+        unresolved: Dict[Tuple[ListService, str], List[Dict[ListService, str]]]
+):
     """
-    Adds ID mappings to a media item
-    :param media_item: The media item for which to add the mapping
-    :param mangadex_item: The mangadex ID containing the mapping information
+    Replaces the stored anilist and myanimelist manga that could not be
+    loaded, so that loading them is retried during the next mangadex update
+    :param unresolved: The manga that could not be loaded and the IDs of the
+                       mangadex items that reference them
     :return: None
     """
-    ids = mangadex_item.external_ids
+    UnresolvedMangadexReference.query.delete()
+    upsert_entries(UnresolvedMangadexReference, [
+        UnresolvedMangadexReference(
+            service=service,
+            service_id=service_id,
+            mangadex_id=ids[ListService.MANGADEX]
+        )
+        for (service, service_id), references in unresolved.items()
+        for ids in references
+    ])
+    db.session.commit()
+    if len(unresolved) > 0:
+        app.logger.warning(f"Could not load {len(unresolved)} items, "
+                           f"retrying during the next update")
+
+
+def __enrich_missing_items(
+        missing: Dict[Tuple[ListService, str], List[Dict[ListService, str]]]
+) -> Set[Tuple[ListService, str]]:
+    """
+    Loads the anilist and myanimelist manga referenced by mangadex items that
+    don't exist in the database yet and stores them in the database.
+    Every service is handled by its own pool of
+    Config.MANGADEX_ENRICHMENT_WORKERS threads, the requests are rate limited
+    by the respective API clients.
+    The results are written to the database in batches of
+    Config.MANGADEX_BATCH_SIZE items.
+    :param missing: The missing manga and the IDs of the mangadex items
+                    that reference them
+    :return: The keys of the created media items
+    """
+    anilist_ids = sorted([
+        int(service_id) for service, service_id in missing
+        if service == ListService.ANILIST
+    ])
+    myanimelist_ids = sorted([
+        int(service_id) for service, service_id in missing
+        if service == ListService.MYANIMELIST
+    ])
+    app.logger.info(f"Loading {len(anilist_ids)} anilist and "
+                    f"{len(myanimelist_ids)} myanimelist items")
+
+    workers = Config.MANGADEX_ENRICHMENT_WORKERS
+    media_items: List[MediaItem] = []
+    id_mappings: List[MediaIdMapping] = []
+    created: Set[Tuple[ListService, str]] = set()
+    with ThreadPoolExecutor(workers) as anilist_executor, \
+            ThreadPoolExecutor(workers) as myanimelist_executor:
+        futures: Dict[Future, ListService] = {}
+        for i in range(0, len(anilist_ids), ANILIST_PAGE_SIZE):
+            futures[anilist_executor.submit(
+                load_anilist_infos,
+                anilist_ids[i:i + ANILIST_PAGE_SIZE],
+                MediaType.MANGA
+            )] = ListService.ANILIST
+        for myanimelist_id in myanimelist_ids:
+            futures[myanimelist_executor.submit(
+                __load_myanimelist_items, myanimelist_id
+            )] = ListService.MYANIMELIST
+
+        try:
+            for future in as_completed(futures):
+                service = futures[future]
+                for service_id, data in future.result().items():
+                    key = (service, str(service_id))
+                    media_items.append(anime_list_item_to_media_item(data))
+                    for ids in missing[key]:
+                        id_mappings += __generate_id_mappings(
+                            service, str(service_id), ids
+                        )
+                    created.add(key)
+
+                if len(media_items) >= Config.MANGADEX_BATCH_SIZE:
+                    __store_enriched_items(media_items, id_mappings)
+                    media_items, id_mappings = [], []
+        finally:
+            # Don't wait for the remaining requests if an error occurred
+            for future in futures:
+                future.cancel()
+
+    __store_enriched_items(media_items, id_mappings)
+    return created
+
+
+def __load_myanimelist_items(
+        myanimelist_id: int
+) -> Dict[int, AnimeListItem]:
+    """
+    Loads a myanimelist manga
+    :param myanimelist_id: The myanimelist ID of the manga
+    :return: The loaded item mapped to its ID, or an empty dictionary if the
+             item could not be loaded
+    """
+    data = load_myanimelist_item(myanimelist_id, MediaType.MANGA)
+    return {} if data is None else {myanimelist_id: data}
+
+
+def __store_enriched_items(
+        media_items: List[MediaItem],
+        id_mappings: List[MediaIdMapping]
+):
+    """
+    Stores media items loaded during the enrichment stage and their
+    ID mappings in the database
+    :param media_items: The media items to store
+    :param id_mappings: The ID mappings to store
+    :return: None
+    """
+    app.logger.debug(f"Upserting {len(media_items)} enriched items")
+    upsert_entries(MediaItem, media_items)
+    upsert_entries(MediaIdMapping, id_mappings)
+    db.session.commit()
+
+
+def __load_existing_keys(
+        keys: Set[Tuple[ListService, str]]
+) -> Set[Tuple[ListService, str]]:
+    """
+    Checks which anilist and myanimelist manga already exist in the database.
+    Only the given keys are queried, using batched IN queries.
+    :param keys: The keys to check as (service, service ID) tuples
+    :return: The existing keys as (service, service ID) tuples
+    """
+    existing_keys: Set[Tuple[ListService, str]] = set()
+    for service in [ListService.ANILIST, ListService.MYANIMELIST]:
+        service_ids = sorted({x[1] for x in keys if x[0] == service})
+        for i in range(0, len(service_ids), MAX_BOUND_PARAMETERS):
+            existing_keys.update(db.session.query(
+                MediaItem.service, MediaItem.service_id
+            ).filter(
+                MediaItem.service == service,
+                MediaItem.media_type == MediaType.MANGA,
+                MediaItem.service_id.in_(
+                    service_ids[i:i + MAX_BOUND_PARAMETERS]
+                )
+            ).all())
+    return existing_keys
+
+
+def __store_covers(
+        mangadex_items: List[MangadexItem],
+        known_covers: Dict[str, str]
+):
+    """
+    Stores the cover filenames of mangadex items that weren't known yet
+    :param mangadex_items: The mangadex items
+    :param known_covers: The known cover filenames, mapped to their cover
+                         IDs. Newly stored covers are added.
+    :return: None
+    """
+    new_covers = {
+        x.cover_id: x.cover_filename
+        for x in mangadex_items
+        if x.cover_id is not None
+        and x.cover_filename is not None
+        and x.cover_id not in known_covers
+    }
+    upsert_entries(MangadexCover, [
+        MangadexCover(cover_id=cover_id, filename=filename)
+        for cover_id, filename in new_covers.items()
+    ])
+    db.session.commit()
+    known_covers.update(new_covers)
+
+
+def __mangadex_ids(mangadex_item: MangadexItem) -> Dict[ListService, str]:
+    """
+    Collects the IDs of a mangadex item, including its mangadex ID
+    :param mangadex_item: The mangadex item
+    :return: The IDs of the mangadex item, mapped to their services
+    """
+    ids = dict(mangadex_item.external_ids)
     ids[ListService.MANGADEX] = mangadex_item.mangadex_id
+    return ids
+
 
+def __generate_id_mappings(
+        parent_service: ListService,
+        parent_service_id: str,
+        ids: Dict[ListService, str]
+) -> List[MediaIdMapping]:
+    """
+    Generates the ID mappings for a manga media item
+    :param parent_service: The service of the media item
+    :param parent_service_id: The service ID of the media item
+    :param ids: The IDs of the mangadex item containing the mapping
+                information, mapped to their services
+    :return: The generated ID mappings
+    """
+    mappings = []
     for service, _id in ids.items():
-        if service == media_item.service:
+        if service == parent_service:
             continue
 
         mapping = MediaIdMapping(
-            parent_service=media_item.service,
-            parent_service_id=media_item.service_id,
-            media_type=media_item.media_type,
+            parent_service=parent_service,
+            parent_service_id=parent_service_id,
+            media_type=MediaType.MANGA,
             service=service,
             service_id=_id
         )
         app.logger.debug(f"Upserting ID mapping "
-                         f"{media_item.service.value}:{media_item.service_id} "
+                         f"{parent_service.value}:{parent_service_id} "
                          f"-> {service.value}:{_id}")
-        db.session.merge(mapping)
+        mappings.append(mapping)
+    return mappings
@@ -51,6 +51,9 @@ class LnRelease(ModelMixin, db.Model):
     physical: bool = db.Column(db.Boolean, primary_key=True)
 
     release_date_string: str = db.Column(db.String(10), nullable=False)
+    release_date: datetime = \
+        db.Column(db.DateTime, nullable=False, index=True)
+    volume_number: int = db.Column(db.Integer, nullable=False)
     publisher: Optional[str] = db.Column(db.String(255), nullable=True)
     purchase_link: Optional[str] = db.Column(db.String(255), nullable=True)
 
@@ -64,24 +67,28 @@ class LnRelease(ModelMixin, db.Model):
         "MediaItem", back_populates="ln_releases"
     )
 
-    @property
-    def release_date(self) -> datetime:
+    @staticmethod
+    def parse_release_date(release_date_string: str) -> datetime:
         """
+        Parses a release date string
+        :param release_date_string: The release date string (ISO 8601)
         :return: The release date as a datetime object
         """
-        return datetime.strptime(self.release_date_string, "%Y-%m-%d")
+        return datetime.strptime(release_date_string, "%Y-%m-%d")
 
-    @property
-    def volume_number(self) -> int:
+    @staticmethod
+    def parse_volume_number(volume: str) -> int:
         """
-        :return: The volume number as an integer
+        Parses the volume number from a volume string
+        :param volume: The volume string
+        :return: The volume number as an integer, 0 if it can't be parsed
         """
         try:
-            if re.match(r"^p[0-9]+[ ]*v[0-9]+$", self.volume.lower()):
-                return int(self.volume.lower().split("v")[1])
+            if re.match(r"^p[0-9]+[ ]*v[0-9]+$", volume.lower()):
+                return int(volume.lower().split("v")[1])
             else:
                 stripped = ""
-                for char in self.volume:
+                for char in volume:
                     if char.isdigit() or char in [".", "-"]:
                         stripped += char
                 if "-" in stripped:
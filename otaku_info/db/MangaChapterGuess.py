@@ -17,10 +17,14 @@ You should have received a copy of the GNU General Public License
 along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
+from typing import Optional, TYPE_CHECKING
 from jerrycan.base import db
 from jerrycan.db.ModelMixin import ModelMixin
 from otaku_info.db.MediaItem import MediaItem
 from otaku_info.enums import MediaType, ListService
+if TYPE_CHECKING:
+    from otaku_info.db.MangaChapterGuessHistory import \
+        MangaChapterGuessHistory
 
 
 class MangaChapterGuess(ModelMixin, db.Model):
@@ -46,9 +50,15 @@ class MangaChapterGuess(ModelMixin, db.Model):
     service_id: str = db.Column(db.String(255), primary_key=True)
     media_type: MediaType = db.Column(db.Enum(MediaType), primary_key=True)
 
-    guess: int = db.Column(db.Integer, nullable=True)
+    guess: Optional[int] = db.Column(db.Integer, nullable=True)
     last_update: int = db.Column(db.Integer, nullable=False, default=0)
 
     media_item: MediaItem = db.relationship(
         "MediaItem", back_populates="chapter_guess"
     )
+    history: Optional["MangaChapterGuessHistory"] = db.relationship(
+        "MangaChapterGuessHistory",
+        uselist=False,
+        back_populates="chapter_guess",
+        cascade="all, delete"
+    )
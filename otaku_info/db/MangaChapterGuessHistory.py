@@ -0,0 +1,57 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from jerrycan.base import db
+from jerrycan.db.ModelMixin import ModelMixin
+from otaku_info.db.MangaChapterGuess import MangaChapterGuess
+from otaku_info.enums import MediaType, ListService
+
+
+class MangaChapterGuessHistory(ModelMixin, db.Model):
+    """
+    Database model that keeps track of how a manga chapter guess changed
+    over time. Used to prioritize updates of the chapter guesses.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """
+        Initializes the Model
+        :param args: The constructor arguments
+        :param kwargs: The constructor keyword arguments
+        """
+        super().__init__(*args, **kwargs)
+
+    __tablename__ = "manga_chapter_guess_histories"
+    __table_args__ = (db.ForeignKeyConstraint(
+        ("service", "service_id", "media_type"),
+        (MangaChapterGuess.service, MangaChapterGuess.service_id,
+         MangaChapterGuess.media_type)
+    ),)
+
+    service: ListService = db.Column(db.Enum(ListService), primary_key=True)
+    service_id: str = db.Column(db.String(255), primary_key=True)
+    media_type: MediaType = db.Column(db.Enum(MediaType), primary_key=True)
+
+    first_update: int = db.Column(db.Integer, nullable=False, default=0)
+    last_change: int = db.Column(db.Integer, nullable=False, default=0)
+    change_count: int = db.Column(db.Integer, nullable=False, default=0)
+
+    chapter_guess: MangaChapterGuess = db.relationship(
+        "MangaChapterGuess", back_populates="history"
+    )
@@ -0,0 +1,41 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from jerrycan.base import db
+from jerrycan.db.ModelMixin import ModelMixin
+
+
+class MangadexCover(ModelMixin, db.Model):
+    """
+    Database model that caches the filenames of mangadex cover images,
+    so that covers that didn't change don't need to be requested again.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """
+        Initializes the Model
+        :param args: The constructor arguments
+        :param kwargs: The constructor keyword arguments
+        """
+        super().__init__(*args, **kwargs)
+
+    __tablename__ = "mangadex_covers"
+
+    cover_id: str = db.Column(db.String(36), primary_key=True)
+    filename: str = db.Column(db.String(255), nullable=False)
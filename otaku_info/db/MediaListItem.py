@@ -17,11 +17,14 @@ You should have received a copy of the GNU General Public License
 along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
+from typing import Optional, TYPE_CHECKING
 from jerrycan.base import db
 from jerrycan.db.ModelMixin import ModelMixin
 from otaku_info.db.MediaList import MediaList
 from otaku_info.db.MediaUserState import MediaUserState
 from otaku_info.enums import ListService, MediaType
+if TYPE_CHECKING:
+    from otaku_info.db.UpdateFeedEntry import UpdateFeedEntry
 
 
 class MediaListItem(ModelMixin, db.Model):
@@ -74,3 +77,9 @@ class MediaListItem(ModelMixin, db.Model):
     media_list: MediaList = db.relationship(
         "MediaList", back_populates="list_items"
     )
+    update_feed_entry: Optional["UpdateFeedEntry"] = db.relationship(
+        "UpdateFeedEntry",
+        uselist=False,
+        back_populates="list_item",
+        cascade="all, delete"
+    )
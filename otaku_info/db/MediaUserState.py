@@ -26,6 +26,8 @@ from otaku_info.enums import ConsumingState, ListService, MediaType
 if TYPE_CHECKING:
     from otaku_info.db.MediaNotification import MediaNotification
     from otaku_info.db.MediaListItem import MediaListItem
+    from otaku_info.db.MediaUserStateFingerprint import \
+        MediaUserStateFingerprint
 
 
 class MediaUserState(ModelMixin, db.Model):
@@ -83,3 +85,9 @@ class MediaUserState(ModelMixin, db.Model):
     media_list_items: List["MediaListItem"] = db.relationship(
         "MediaListItem", back_populates="user_state", cascade="all, delete"
     )
+    fingerprint: Optional["MediaUserStateFingerprint"] = db.relationship(
+        "MediaUserStateFingerprint",
+        uselist=False,
+        back_populates="media_user_state",
+        cascade="all, delete"
+    )
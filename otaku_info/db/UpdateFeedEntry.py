@@ -0,0 +1,133 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+
+from typing import Optional, List
+from jerrycan.base import db
+from jerrycan.db.ModelMixin import ModelMixin
+from otaku_info.db.MediaItem import MediaItem
+from otaku_info.db.MediaIdMapping import MediaIdMapping
+from otaku_info.db.MediaListItem import MediaListItem
+from otaku_info.enums import ListService, MediaType, MediaSubType, \
+    ReleasingState
+
+
+class UpdateFeedEntry(ModelMixin, db.Model):
+    """
+    Database model for the precomputed updates of media list items.
+    Every media list item has one entry that contains the user's progress,
+    the latest release and the difference between those.
+    The entries are refreshed by the background tasks whenever the
+    underlying data changes, so that the updates page can filter and sort
+    them in the database.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """
+        Initializes the Model
+        :param args: The constructor arguments
+        :param kwargs: The constructor keyword arguments
+        """
+        super().__init__(*args, **kwargs)
+
+    __tablename__ = "update_feed_entries"
+    __table_args__ = (
+        db.ForeignKeyConstraint(
+            ("user_state_service", "user_state_service_id",
+             "user_state_media_type", "user_state_user_id",
+             "media_list_service", "media_list_media_type",
+             "media_list_user_id", "media_list_name"),
+            (MediaListItem.user_state_service,
+             MediaListItem.user_state_service_id,
+             MediaListItem.user_state_media_type,
+             MediaListItem.user_state_user_id,
+             MediaListItem.media_list_service,
+             MediaListItem.media_list_media_type,
+             MediaListItem.media_list_user_id,
+             MediaListItem.media_list_name)
+        ),
+        db.ForeignKeyConstraint(
+            ("user_state_service", "user_state_service_id",
+             "user_state_media_type"),
+            (MediaItem.service, MediaItem.service_id, MediaItem.media_type)
+        ),
+        db.Index(
+            "ix_update_feed_entries_list_score",
+            "media_list_user_id", "media_list_service",
+            "media_list_media_type", "media_list_name", "score"
+        )
+    )
+
+    media_list_service: ListService = \
+        db.Column(db.Enum(ListService), primary_key=True)
+    media_list_media_type: MediaType = \
+        db.Column(db.Enum(MediaType), primary_key=True)
+    media_list_user_id: int = db.Column(db.Integer, primary_key=True)
+    media_list_name: str = db.Column(db.String(255), primary_key=True)
+
+    user_state_service: ListService = \
+        db.Column(db.Enum(ListService), primary_key=True)
+    user_state_service_id: str = db.Column(db.String(255), primary_key=True)
+    user_state_media_type: MediaType = \
+        db.Column(db.Enum(MediaType), primary_key=True)
+    user_state_user_id: int = db.Column(db.Integer, primary_key=True)
+
+    media_subtype: MediaSubType = \
+        db.Column(db.Enum(MediaSubType), nullable=False)
+    releasing_state: ReleasingState = \
+        db.Column(db.Enum(ReleasingState), nullable=False)
+    score: Optional[int] = db.Column(db.Integer, nullable=True)
+    progress: int = db.Column(db.Integer, nullable=False)
+    latest: int = db.Column(db.Integer, nullable=False)
+    diff: int = db.Column(db.Integer, nullable=False)
+
+    list_item: MediaListItem = db.relationship(
+        "MediaListItem", back_populates="update_feed_entry"
+    )
+    media_item: MediaItem = db.relationship("MediaItem", viewonly=True)
+
+    @property
+    def title(self) -> str:
+        """
+        :return: The title of the media item
+        """
+        return self.media_item.title
+
+    @property
+    def cover_url(self) -> str:
+        """
+        :return: The cover URL of the media item
+        """
+        return self.media_item.cover_url
+
+    @property
+    def url(self) -> str:
+        """
+        :return: The URL of the media item's page
+        """
+        return self.media_item.own_url
+
+    @property
+    def related_ids(self) -> List[MediaIdMapping]:
+        """
+        :return: The ID mappings of the media item, sorted by service
+        """
+        related_ids = list(self.media_item.ids.values())
+        related_ids.sort(key=lambda x: x.service.name)
+        return related_ids
@@ -20,18 +20,28 @@ LICENSE"""
 from typing import List
 from jerrycan.base import db
 from otaku_info.db.MangaChapterGuess import MangaChapterGuess
+from otaku_info.db.MangaChapterGuessHistory import \
+    MangaChapterGuessHistory
+from otaku_info.db.MangadexCover import MangadexCover
 from otaku_info.db.MediaIdMapping import MediaIdMapping
 from otaku_info.db.MediaItem import MediaItem
 from otaku_info.db.MediaList import MediaList
 from otaku_info.db.MediaListItem import MediaListItem
 from otaku_info.db.MediaUserState import MediaUserState
 from otaku_info.db.MediaNotification import MediaNotification
+from otaku_info.db.MediaUserStateFingerprint import MediaUserStateFingerprint
 from otaku_info.db.ServiceUsername import ServiceUsername
+from otaku_info.db.SyncWatermark import SyncWatermark
 from otaku_info.db.NotificationSetting import NotificationSetting
 from otaku_info.db.LnRelease import LnRelease
+from otaku_info.db.UpdateFeedEntry import UpdateFeedEntry
+from otaku_info.db.UnresolvedMangadexReference import \
+    UnresolvedMangadexReference
 
 models: List[db.Model] = [
     MangaChapterGuess,
+    MangaChapterGuessHistory,
+    MangadexCover,
     MediaIdMapping,
     MediaItem,
     MediaList,
@@ -39,8 +49,12 @@ models: List[db.Model] = [
     MediaUserState,
     ServiceUsername,
     MediaNotification,
+    MediaUserStateFingerprint,
     NotificationSetting,
-    LnRelease
+    LnRelease,
+    SyncWatermark,
+    UpdateFeedEntry,
+    UnresolvedMangadexReference
 ]
 """
 The database models of the application
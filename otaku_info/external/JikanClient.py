@@ -0,0 +1,202 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import json
+import time
+import random
+from threading import Lock
+from typing import Optional, Dict, Any, Tuple
+from requests import Response
+from requests.exceptions import RequestException
+from jerrycan.base import app
+from otaku_info.Config import Config
+from otaku_info.external.http import http_get
+from otaku_info.utils.TokenBucket import TokenBucket
+
+
+class JikanClient:
+    """
+    Client for the jikan API, which provides myanimelist data.
+    Requests are limited by two token buckets that match jikan's
+    per-second and per-minute quotas. Failed or throttled requests are
+    retried using exponential backoff with jitter, up to
+    Config.JIKAN_MAX_RETRIES times.
+    Timings and retry counts are recorded and can be retrieved using the
+    metrics method.
+    """
+
+    API_URL = "https://api.jikan.moe/v3"
+    """
+    The base URL of the jikan API
+    """
+
+    def __init__(self, per_second: int = 2, per_minute: int = 30):
+        """
+        Initializes the jikan client
+        :param per_second: The maximum amount of requests per second
+        :param per_minute: The maximum amount of requests per minute
+        """
+        self.second_limiter = TokenBucket(per_second, per_second)
+        self.minute_limiter = TokenBucket(per_minute / 60, per_minute)
+        self.lock = Lock()
+        self.counters: Dict[str, float] = {
+            "requests": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "failures": 0,
+            "request_time": 0.0,
+            "max_request_time": 0.0,
+            "backoff_time": 0.0
+        }
+
+    def get(self, endpoint: str) -> Optional[Dict[str, Any]]:
+        """
+        Retrieves data from the jikan API
+        :param endpoint: The endpoint to query, for example 'manga/1'
+        :return: The response JSON, or None if the request failed or jikan
+                 could not provide the requested data
+        """
+        return self.fetch(endpoint)[1]
+
+    def fetch(self, endpoint: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """
+        Retrieves data from the jikan API and reports whether jikan answered
+        the request, so that unknown IDs can be told apart from failed
+        requests
+        :param endpoint: The endpoint to query, for example 'manga/1'
+        :return: Whether jikan answered the request, as well as the
+                 response JSON, or None if the request failed or jikan
+                 could not provide the requested data
+        """
+        url = f"{self.API_URL}/{endpoint}"
+        for attempt in range(Config.JIKAN_MAX_RETRIES + 1):
+            self.minute_limiter.acquire()
+            self.second_limiter.acquire()
+
+            start = time.time()
+            response: Optional[Response] = None
+            try:
+                response = http_get(url, retry=False)
+            except RequestException:
+                pass
+            self.__record_request(time.time() - start)
+
+            retry_after: Optional[float] = None
+            if response is not None:
+                data = self.__parse(response)
+                if response.status_code == 429 or (
+                        data is not None
+                        and data.get("type") == "RateLimitException"
+                ):
+                    retry_after = self.__handle_rate_limit(response)
+                elif response.status_code < 300:
+                    if data is None:
+                        app.logger.warning(f"Invalid jikan response for "
+                                           f"{endpoint}")
+                    elif data.get("type") == "BadResponseException":
+                        return False, None
+                    else:
+                        return True, data
+                elif response.status_code < 500:
+                    return True, None
+
+            if attempt < Config.JIKAN_MAX_RETRIES:
+                self.__backoff(attempt, retry_after)
+
+        app.logger.warning(f"Giving up on jikan request {endpoint}")
+        self.__increment("failures")
+        return False, None
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Retrieves the metrics recorded by the client
+        :return: The metrics, including the amount of requests, retries,
+                 rate limited requests and failed requests as well as the
+                 total and maximum request time and total backoff time
+                 in seconds
+        """
+        with self.lock:
+            return dict(self.counters)
+
+    def __parse(self, response: Response) -> Optional[Dict[str, Any]]:
+        """
+        Parses the JSON body of a response
+        :param response: The response to parse
+        :return: The parsed JSON, or None if the body is no JSON object
+        """
+        try:
+            data = json.loads(response.text)
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+
+    def __handle_rate_limit(self, response: Response) -> Optional[float]:
+        """
+        Handles a response that indicates that the rate limit was exceeded.
+        All requests of this client are paused for the time specified by the
+        Retry-After header, if available.
+        :param response: The response
+        :return: The amount of seconds to wait, if specified by jikan
+        """
+        app.logger.warning("Rate limited by jikan")
+        self.__increment("rate_limited")
+        try:
+            retry_after = float(response.headers.get("Retry-After", ""))
+        except ValueError:
+            return None
+        self.minute_limiter.pause(retry_after)
+        return retry_after
+
+    def __backoff(self, attempt: int, retry_after: Optional[float]):
+        """
+        Waits before retrying a request using exponential backoff with
+        full jitter, capped at Config.JIKAN_MAX_BACKOFF seconds
+        :param attempt: The number of the failed attempt, starting at 0
+        :param retry_after: A minimum delay requested by the API
+        :return: None
+        """
+        cap = min(Config.JIKAN_MAX_BACKOFF, 2 ** attempt)
+        delay = random.uniform(0, cap)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, Config.JIKAN_MAX_BACKOFF))
+        with self.lock:
+            self.counters["retries"] += 1
+            self.counters["backoff_time"] += delay
+        time.sleep(delay)
+
+    def __record_request(self, duration: float):
+        """
+        Records the duration of a request
+        :param duration: The duration of the request in seconds
+        :return: None
+        """
+        with self.lock:
+            self.counters["requests"] += 1
+            self.counters["request_time"] += duration
+            self.counters["max_request_time"] = \
+                max(self.counters["max_request_time"], duration)
+
+    def __increment(self, counter: str):
+        """
+        Increments a counter
+        :param counter: The name of the counter
+        :return: None
+        """
+        with self.lock:
+            self.counters[counter] += 1
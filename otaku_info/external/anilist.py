@@ -17,16 +17,28 @@ You should have received a copy of the GNU General Public License
 along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
-import time
-from requests import ConnectionError
-from requests.exceptions import ChunkedEncodingError
-from typing import Optional, List
-from puffotter.graphql import GraphQlClient
+import json
+from requests import Response
+from requests.exceptions import RequestException
+from typing import Optional, List, Dict, Any
 from otaku_info.enums import MediaType, ListService
 from otaku_info.external.entities.AnilistItem import AnilistItem
 from otaku_info.external.entities.AnilistUserItem import AnilistUserItem
+from otaku_info.Config import Config
+from otaku_info.external.http import http_post, response_cache
+from otaku_info.utils.TokenBucket import TokenBucket
 
 
+anilist_rate_limiter = TokenBucket(90 / 60, 10)
+"""
+Rate limiter shared by all requests to the anilist API.
+Anilist allows up to 90 requests per minute.
+"""
+
+ANILIST_API_URL = "https://graphql.anilist.co"
+ANILIST_PAGE_SIZE = 50
+ANILIST_ACTIVITY_BATCH_SIZE = 10
+
 MEDIA_QUERY = """
     id
     idMal
@@ -58,17 +70,80 @@ MEDIA_QUERY = """
 """
 
 
+def query_anilist(
+        query: str,
+        variables: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    """
+    Executes a GraphQL query on the anilist API.
+    Requests are rate limited and use the shared HTTP session without
+    automatic retries, so that throttled requests are handled by the
+    rate limiter, which adapts to the rate limit headers sent by anilist.
+    :param query: The GraphQL query to execute
+    :param variables: The variables of the query
+    :return: The response JSON, or None if an error occurred
+    """
+    anilist_rate_limiter.acquire()
+    try:
+        resp = http_post(ANILIST_API_URL, retry=False, json={
+            "query": query,
+            "variables": variables
+        })
+    except RequestException:
+        return None
+    __update_rate_limiter(resp)
+    if resp.status_code >= 300:
+        return None
+    return json.loads(resp.text)
+
+
+def __update_rate_limiter(resp: Response):
+    """
+    Adjusts the anilist rate limiter based on the rate limit headers of a
+    response. X-RateLimit-Limit sets the rate (requests per minute),
+    X-RateLimit-Remaining caps the available tokens and Retry-After pauses
+    all requests once the rate limit was exceeded.
+    :param resp: The response to evaluate
+    :return: None
+    """
+    headers = resp.headers
+    try:
+        limit = int(headers.get("X-RateLimit-Limit", 0))
+        if limit > 0:
+            anilist_rate_limiter.set_rate(limit / 60)
+        if "X-RateLimit-Remaining" in headers:
+            anilist_rate_limiter.synchronize(
+                int(headers["X-RateLimit-Remaining"])
+            )
+        if resp.status_code == 429:
+            anilist_rate_limiter.pause(int(headers.get("Retry-After", 60)))
+    except ValueError:
+        pass
+
+
 def guess_latest_manga_chapter(anilist_id: int) -> Optional[int]:
     """
     Guesses the latest chapter number based on anilist user activity
     :param anilist_id: The anilist ID to check
     :return: The latest chapter number
     """
-    graphql = GraphQlClient("https://graphql.anilist.co")
-    query = """
-    query ($id: Int) {
-        Page(page: 1) {
-        activities(mediaId: $id, sort: ID_DESC) {
+    return guess_latest_manga_chapters([anilist_id]).get(anilist_id)
+
+
+def guess_latest_manga_chapters(
+        anilist_ids: List[int]
+) -> Dict[int, Optional[int]]:
+    """
+    Guesses the latest chapter numbers of multiple manga based on anilist
+    user activity. The activities of up to 10 manga are fetched with a
+    single query by using GraphQL aliases.
+    :param anilist_ids: The anilist IDs to check
+    :return: The latest chapter numbers, mapped to the anilist IDs.
+             IDs that could not be fetched are not included.
+    """
+    activity_query = """
+        id@{ID}: Page(page: 1) {
+            activities(mediaId: @{ID}, sort: ID_DESC) {
                 ... on ListActivity {
                     progress
                     userId
@@ -79,20 +154,37 @@ def guess_latest_manga_chapter(anilist_id: int) -> Optional[int]:
                 }
             }
         }
-    }
     """
-    try:
-        resp = graphql.query(query, {"id": anilist_id})
-    except (ChunkedEncodingError, ConnectionError):
-        return None
 
-    if resp is None:
-        return None
+    ids = sorted(set(anilist_ids))
+    guesses: Dict[int, Optional[int]] = {}
+    for i in range(0, len(ids), ANILIST_ACTIVITY_BATCH_SIZE):
+        batch = ids[i:i + ANILIST_ACTIVITY_BATCH_SIZE]
+        query = "query {%s}" % "".join([
+            activity_query.replace("@{ID}", str(int(anilist_id)))
+            for anilist_id in batch
+        ])
+        resp = query_anilist(query, {})
+        if resp is None or resp.get("data") is None:
+            continue
+        for anilist_id in batch:
+            page = resp["data"].get(f"id{anilist_id}")
+            if page is not None:
+                guesses[anilist_id] = \
+                    __guess_from_activities(page["activities"])
+    return guesses
 
-    data = resp["data"]["Page"]["activities"]
 
+def __guess_from_activities(
+        activities: List[Dict[str, Any]]
+) -> Optional[int]:
+    """
+    Guesses the latest chapter number using a list of anilist activities
+    :param activities: The activities, newest first
+    :return: The latest chapter number
+    """
     progresses = []
-    for entry in data:
+    for entry in activities:
         progress = entry["progress"]
         status = entry["status"]
         chapters = entry["media"]["chapters"]
@@ -106,7 +198,6 @@ def guess_latest_manga_chapter(anilist_id: int) -> Optional[int]:
     progresses = progresses[0:20]
     progresses.sort(key=lambda x: progresses.count(x), reverse=True)
     progresses = sorted(progresses, key=progresses.count, reverse=True)
-    time.sleep(0.5)
 
     try:
         return progresses[0]
@@ -124,7 +215,24 @@ def load_anilist(
     :param media_type: The media type, either MANGA or ANIME
     :return: The anilist list items for the user and media type
     """
-    graphql = GraphQlClient("https://graphql.anilist.co")
+    return [
+        AnilistUserItem.from_query(media_type, entry)
+        for entry in load_anilist_entries(username, media_type)
+    ]
+
+
+def load_anilist_entries(
+        username: str,
+        media_type: MediaType
+) -> List[Dict[str, Any]]:
+    """
+    Loads the raw list entries of a user's anilist without parsing them.
+    The name of the list an entry belongs to is stored in the entry's
+    'list_name' key.
+    :param username: The username
+    :param media_type: The media type, either MANGA or ANIME
+    :return: The raw anilist list entries for the user and media type
+    """
     query = """
     query ($username: String, $media_type: MediaType) {
         MediaListCollection(userName: $username, type: $media_type) {
@@ -142,26 +250,23 @@ def load_anilist(
     }
     """.replace("@{MEDIA_QUERY}", MEDIA_QUERY)
 
-    try:
-        resp = graphql.query(query, {
-            "username": username,
-            "media_type": media_type.value.upper()
-        })
-    except (ChunkedEncodingError, ConnectionError):
-        return []
+    resp = query_anilist(query, {
+        "username": username,
+        "media_type": media_type.value.upper()
+    })
     if resp is None:
         return []
     user_lists = resp["data"]["MediaListCollection"]["lists"]
 
-    anilist_items: List[AnilistUserItem] = []
+    anilist_entries: List[Dict[str, Any]] = []
     for entries, list_name in [
         (y["entries"], y["name"]) for y in user_lists
     ]:
         for entry in entries:
             entry["list_name"] = list_name
-            anilist_items.append(AnilistUserItem.from_query(media_type, entry))
+            anilist_entries.append(entry)
 
-    return anilist_items
+    return anilist_entries
 
 
 def load_anilist_info(
@@ -177,30 +282,74 @@ def load_anilist_info(
                     (either anilist or myanimelist)
     :return: The fetched AnilistItem
     """
-    graphql = GraphQlClient("https://graphql.anilist.co")
+    return load_anilist_infos([service_id], media_type, service)\
+        .get(service_id)
+
+
+def load_anilist_infos(
+        service_ids: List[int],
+        media_type: MediaType,
+        service: ListService = ListService.ANILIST
+) -> Dict[int, AnilistItem]:
+    """
+    Loads information for multiple anilist media items.
+    Up to 50 items are fetched with a single query.
+    Responses are cached for Config.ANILIST_CACHE_TTL seconds,
+    IDs that anilist doesn't know are cached for
+    Config.NEGATIVE_CACHE_TTL seconds.
+    :param service_ids: The anilist or myanimelist media IDs
+    :param media_type: The media type
+    :param service: The service the IDs belong to
+                    (either anilist or myanimelist)
+    :return: The fetched AnilistItems, mapped to the IDs used to fetch them.
+             IDs that could not be fetched are not included.
+    """
     query = """
-        query ($id: Int, $media_type: MediaType) {
-            Media(@{ID}: $id, type: $media_type) {
-                @{MEDIA_QUERY}
+        query ($ids: [Int], $media_type: MediaType) {
+            Page(page: 1, perPage: @{PAGE_SIZE}) {
+                media(@{ID}_in: $ids, type: $media_type) {
+                    @{MEDIA_QUERY}
+                }
             }
         }
-    """.replace("@{MEDIA_QUERY}", MEDIA_QUERY)
+    """.replace("@{MEDIA_QUERY}", MEDIA_QUERY)\
+        .replace("@{PAGE_SIZE}", str(ANILIST_PAGE_SIZE))
     if service == ListService.ANILIST:
-        query = query.replace("@{ID}", "id")
+        id_key = "id"
     elif service == ListService.MYANIMELIST:
-        query = query.replace("@{ID}", "idMal")
+        id_key = "idMal"
     else:
-        return None
+        return {}
+    query = query.replace("@{ID}", id_key)
 
-    try:
-        resp = graphql.query(
-            query,
-            {"id": service_id, "media_type": media_type.value.upper()}
-        )
-    except (ChunkedEncodingError, ConnectionError):
-        return None
+    namespace = f"anilist-{id_key}-{media_type.value}"
+    entries = response_cache.get_many(
+        namespace, [str(x) for x in sorted(set(service_ids))]
+    )
+    ids = sorted(set(service_ids) - set([int(x) for x in entries]))
+    for i in range(0, len(ids), ANILIST_PAGE_SIZE):
+        batch = ids[i:i + ANILIST_PAGE_SIZE]
+        resp = query_anilist(query, {
+            "ids": batch,
+            "media_type": media_type.value.upper()
+        })
+        if resp is None:
+            continue
+        fetched = {
+            str(entry[id_key]): entry
+            for entry in resp["data"]["Page"]["media"]
+        }
+        unknown = {
+            str(service_id): None
+            for service_id in batch
+            if str(service_id) not in fetched
+        }
+        response_cache.set_many(namespace, fetched, Config.ANILIST_CACHE_TTL)
+        response_cache.set_many(namespace, unknown, Config.NEGATIVE_CACHE_TTL)
+        entries.update(fetched)
 
-    if resp is None:
-        return None
-    else:
-        return AnilistItem.from_query(media_type, resp["data"]["Media"])
+    return {
+        int(service_id): AnilistItem.from_query(media_type, entry)
+        for service_id, entry in entries.items()
+        if entry is not None
+    }
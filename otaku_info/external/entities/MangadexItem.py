@@ -37,7 +37,8 @@ class MangadexItem:
             cover_url: str,
             total_chapters: Optional[int],
             latest_chapter: Optional[int],
-            releasing_state: ReleasingState
+            releasing_state: ReleasingState,
+            cover_id: Optional[str] = None
     ):
         """
         Initializes the MangadexItem object
@@ -49,6 +50,7 @@ class MangadexItem:
         :param total_chapters: The total amount of chapters
         :param latest_chapter: The latest chapter
         :param releasing_state: The releasing state
+        :param cover_id: The mangadex ID of the cover image
         """
         self.mangadex_id = mangadex_id
         self.external_ids = external_ids
@@ -58,6 +60,8 @@ class MangadexItem:
         self.total_chapters = total_chapters
         self.latest_chapter = latest_chapter
         self.releasing_state = releasing_state
+        self.cover_id = cover_id
+        self.cover_filename: Optional[str] = None
 
     @classmethod
     def from_json(cls, raw_data: Dict[str, Any]) \
@@ -119,7 +123,8 @@ class MangadexItem:
             relations.get("cover_art", ""),
             total_chapters,
             total_chapters,
-            releasing_state
+            releasing_state,
+            relations.get("cover_art")
         )
 
     @staticmethod
@@ -18,7 +18,7 @@ along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from bs4.element import Tag
 from otaku_info.utils.dates import map_month_name_to_month_number
 from otaku_info.external.anilist import load_anilist_info
@@ -115,6 +115,32 @@ class RedditLnRelease:
         else:
             return None
 
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Converts the release into a JSON serializable dictionary
+        :return: The dictionary
+        """
+        return {
+            "series_name": self.series_name,
+            "year": self.year,
+            "release_date_string": self._release_date_string,
+            "volume": self.volume,
+            "publisher": self.publisher,
+            "purchase_link": self.purchase_link,
+            "info_link": self.info_link,
+            "digital": self.digital,
+            "physical": self.physical
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RedditLnRelease":
+        """
+        Generates a reddit LN release from a dictionary generated by to_dict
+        :param data: The dictionary
+        :return: The reddit ln release
+        """
+        return cls(**data)
+
     @classmethod
     def from_parts(cls, year: int, parts: List[Tag]) -> "RedditLnRelease":
         """
@@ -0,0 +1,137 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from threading import Lock
+from typing import Any, Dict
+from requests import Session, Response
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from otaku_info.Config import Config
+from otaku_info.utils.ResponseCache import ResponseCache
+
+response_cache = ResponseCache()
+"""
+Persistent cache for responses of external APIs, shared by all
+external API clients
+"""
+
+__sessions: Dict[bool, Session] = {}
+"""
+The HTTP sessions shared by all external API clients,
+with and without automatic retries
+"""
+
+__session_lock = Lock()
+"""
+Lock that makes sure that every session is only created once
+"""
+
+
+def get_http_session(retry: bool = True) -> Session:
+    """
+    Retrieves the HTTP session shared by all external API clients.
+    The session keeps a pool of keep-alive connections for every host and
+    retries failed requests using exponential backoff, so that TCP and TLS
+    connections are reused across requests and threads.
+    Pool sizes and retry behaviour are configured using the HTTP_* values
+    of the Config class.
+    :param retry: Whether failed requests should be retried automatically.
+                  API clients with their own retry logic can disable this.
+    :return: The HTTP session
+    """
+    with __session_lock:
+        if retry not in __sessions:
+            total = Config.HTTP_RETRIES if retry else 0
+            status_forcelist = (429, 500, 502, 503, 504)
+            try:
+                retries = Retry(
+                    total=total,
+                    backoff_factor=Config.HTTP_BACKOFF_FACTOR,
+                    status_forcelist=status_forcelist,
+                    raise_on_status=False,
+                    allowed_methods=None
+                )
+            except TypeError:  # urllib3 < 1.26
+                retries = Retry(  # type: ignore
+                    total=total,
+                    backoff_factor=Config.HTTP_BACKOFF_FACTOR,
+                    status_forcelist=status_forcelist,
+                    raise_on_status=False,
+                    method_whitelist=None
+                )
+
+            adapter = HTTPAdapter(
+                pool_connections=16,
+                pool_maxsize=Config.HTTP_POOL_SIZE,
+                max_retries=retries
+            )
+            session = Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            __sessions[retry] = session
+        return __sessions[retry]
+
+
+def http_request(
+        method: str,
+        url: str,
+        retry: bool = True,
+        **kwargs: Any
+) -> Response:
+    """
+    Executes an HTTP request using the shared HTTP session
+    :param method: The HTTP method to use
+    :param url: The URL to send the request to
+    :param retry: Whether failed requests should be retried automatically
+    :param kwargs: Keyword arguments passed on to requests.
+                   If no timeout is specified, Config.HTTP_TIMEOUT is used.
+    :return: The response
+    """
+    kwargs.setdefault("timeout", Config.HTTP_TIMEOUT)
+    return get_http_session(retry).request(method, url, **kwargs)
+
+
+def http_get(url: str, **kwargs: Any) -> Response:
+    """
+    Executes a GET request using the shared HTTP session
+    :param url: The URL to send the request to
+    :param kwargs: Keyword arguments passed on to requests
+    :return: The response
+    """
+    return http_request("GET", url, **kwargs)
+
+
+def http_post(url: str, **kwargs: Any) -> Response:
+    """
+    Executes a POST request using the shared HTTP session
+    :param url: The URL to send the request to
+    :param kwargs: Keyword arguments passed on to requests
+    :return: The response
+    """
+    return http_request("POST", url, **kwargs)
+
+
+def http_head(url: str, **kwargs: Any) -> Response:
+    """
+    Executes a HEAD request using the shared HTTP session
+    :param url: The URL to send the request to
+    :param kwargs: Keyword arguments passed on to requests
+    :return: The response
+    """
+    return http_request("HEAD", url, **kwargs)
@@ -18,100 +18,182 @@ along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
 import json
-import requests
+from datetime import datetime
+from requests.exceptions import HTTPError
 from jerrycan.base import app
-from typing import Optional, List, Dict, Any, Union
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, List, Dict, Union, Generator, Deque
 from otaku_info.external.entities.MangadexItem import MangadexItem
+from otaku_info.Config import Config
+from otaku_info.external.http import http_get, response_cache
 
+MANGADEX_PAGE_SIZE = 100
+"""
+The amount of mangadex items fetched per request
+"""
 
-def fetch_all_mangadex_items() -> List[MangadexItem]:
+MANGADEX_RESULT_WINDOW = 10000
+"""
+The maximum offset + limit mangadex allows when paging through results.
+Requests beyond this window are rejected with status 400.
+"""
+
+
+def fetch_all_mangadex_items(
+        updated_since: Optional[int] = None,
+        known_covers: Optional[Dict[str, str]] = None
+) -> Generator[MangadexItem, None, None]:
     """
-    Fetches all available mangadex items
-    :return: The mangadex items
+    Fetches all available mangadex items.
+    The items are fetched page by page and yielded as soon as a page was
+    loaded, so that only a few pages need to be kept in memory.
+    The covers of a page are resolved by up to Config.MANGADEX_COVER_WORKERS
+    threads while the next pages are being fetched.
+    Raises a HTTPError if the API responds with an error, so that an
+    incomplete result can be told apart from a complete one.
+    :param updated_since: If provided, only items that were updated after
+                          this UNIX timestamp are fetched
+    :param known_covers: Cover filenames that are already known,
+                         mapped to their cover IDs
+    :return: A generator that yields the mangadex items
+    """
+    workers = Config.MANGADEX_COVER_WORKERS
+    with ThreadPoolExecutor(workers) as executor:
+        pending: Deque[Future] = deque()
+        for page in __fetch_pages(updated_since):
+            pending.append(executor.submit(add_covers, page, known_covers))
+            while len(pending) > workers:
+                yield from pending.popleft().result()
+        while len(pending) > 0:
+            yield from pending.popleft().result()
+
+
+def __fetch_pages(
+        updated_since: Optional[int]
+) -> Generator[List[MangadexItem], None, None]:
+    """
+    Fetches all available mangadex items page by page, without covers.
+    Since mangadex only allows paging through the first
+    MANGADEX_RESULT_WINDOW results, fetching continues with the items
+    created or updated after the last fetched item once the window is
+    exhausted.
+    Raises a HTTPError if the API responds with any other error, so that an
+    incomplete result can be told apart from a complete one.
+    :param updated_since: If provided, only items that were updated after
+                          this UNIX timestamp are fetched
+    :return: A generator that yields the pages of mangadex items
     """
     url = "https://api.mangadex.org/manga"
-    items: List[Dict[str, Any]] = []
-    mangadex_items: List[MangadexItem] = []
     page = 0
-    last_date = "1970-01-01T00:00:00"
+    if updated_since is None:
+        date_key = "createdAt"
+        last_date = "1970-01-01T00:00:00"
+    else:
+        date_key = "updatedAt"
+        last_date = datetime.utcfromtimestamp(updated_since)\
+            .strftime("%Y-%m-%dT%H:%M:%S")
+    last_item_date: Optional[str] = None
 
     while True:
+        offset = MANGADEX_PAGE_SIZE * page
         params: Dict[str, Union[int, str]] = {
-            "createdAtSince": last_date,
-            "order[createdAt]": "asc",
-            "limit": 100,
-            "offset": 100 * page
+            f"{date_key}Since": last_date,
+            f"order[{date_key}]": "asc",
+            "limit": MANGADEX_PAGE_SIZE,
+            "offset": offset
         }
         app.logger.debug(f"Mangadex: {params}")
-        response = requests.get(url, params=params)
-        data = json.loads(response.text)
-
-        if "results" not in data:
-            new_date = items[-1]["data"]["attributes"]["createdAt"]
-            new_date = new_date.split("T")[0] + "T00:00:00"
+        response = http_get(url, params=params)
 
+        if response.status_code == 400 and last_item_date is not None \
+                and offset + MANGADEX_PAGE_SIZE > MANGADEX_RESULT_WINDOW:
+            new_date = last_item_date.split("T")[0] + "T00:00:00"
             if new_date == last_date:
                 break
             else:
                 last_date = new_date
                 page = 0
                 continue
+        elif response.status_code >= 300:
+            raise HTTPError(
+                f"Mangadex responded with status {response.status_code}",
+                response=response
+            )
+
+        data = json.loads(response.text)
+        if "results" not in data:
+            raise HTTPError("Mangadex response without results",
+                            response=response)
         elif len(data["results"]) == 0:
             break
 
-        items += data["results"]
-        new_items = [
-            MangadexItem.from_json(x)
-            for x in data["results"]
-        ]
-        add_covers(new_items)
-        mangadex_items += new_items
+        last_item_date = data["results"][-1]["data"]["attributes"][date_key]
+        yield [MangadexItem.from_json(x) for x in data["results"]]
         page += 1
 
-    mangadex_items.sort(key=lambda x: x.english_title)
-    return mangadex_items
-
 
 def fetch_mangadex_item(mangadex_id: str) -> Optional[MangadexItem]:
     """
-    Fetches information for a mangadex
+    Fetches information for a mangadex item.
+    Responses are cached for Config.MANGADEX_CACHE_TTL seconds.
+    :param mangadex_id: The mangadex ID of the item
+    :return: The mangadex item
     """
-    url = "https://api.mangadex.org/manga"
-    response = requests.get(url, params={"ids[]": mangadex_id})
-
-    if response.status_code >= 300:
-        return None
-
-    data = json.loads(response.text)["results"][0]
+    data = response_cache.get("mangadex", mangadex_id)
+    if data is None:
+        url = "https://api.mangadex.org/manga"
+        response = http_get(url, params={"ids[]": mangadex_id})
+
+        if response.status_code >= 300:
+            return None
+
+        data = json.loads(response.text)["results"][0]
+        response_cache.set(
+            "mangadex", mangadex_id, data, Config.MANGADEX_CACHE_TTL
+        )
     return MangadexItem.from_json(data)
 
 
-def add_covers(mangadex_items: List[MangadexItem]):
+def add_covers(
+        mangadex_items: List[MangadexItem],
+        known_covers: Optional[Dict[str, str]] = None
+) -> List[MangadexItem]:
     """
-    Adds cover URLs to mangadex items
+    Adds cover URLs to mangadex items.
+    Only the covers whose filenames aren't known yet are requested.
     :param mangadex_items: The mangadex items
-    :return: None
+    :param known_covers: Cover filenames that are already known,
+                         mapped to their cover IDs
+    :return: The mangadex items
     """
-    url = "https://api.mangadex.org/cover"
-    ids = [
-        x.cover_url
-        for x in mangadex_items
-        if x.cover_url is not None and len(x.cover_url) == 36
-    ]
-    params: Dict[str, Union[int, list]] = {"ids[]": [ids], "limit": 100}
-    response = requests.get(url, params=params)
-    data = json.loads(response.text)
-    results = data["results"]
-
-    covers = {}
-    for result in results:
-        relations = {x["type"]: x["id"] for x in result["relationships"]}
-        covers[relations["manga"]] = result["data"]["attributes"]["fileName"]
+    known_covers = {} if known_covers is None else known_covers
+    filenames: Dict[str, str] = {}
+    ids = []
+    for mangadex_item in mangadex_items:
+        cover_id = mangadex_item.cover_id
+        if cover_id is None or len(cover_id) != 36:
+            continue
+        elif cover_id in known_covers:
+            filenames[cover_id] = known_covers[cover_id]
+        else:
+            ids.append(cover_id)
+
+    if len(ids) > 0:
+        url = "https://api.mangadex.org/cover"
+        params: Dict[str, Union[int, list]] = {"ids[]": ids, "limit": 100}
+        response = http_get(url, params=params)
+        data = json.loads(response.text)
+        for result in data["results"]:
+            filenames[result["data"]["id"]] = \
+                result["data"]["attributes"]["fileName"]
 
     for mangadex_item in mangadex_items:
-        filename = covers.get(mangadex_item.mangadex_id)
+        filename = filenames.get(str(mangadex_item.cover_id))
+        mangadex_item.cover_filename = filename
         if filename is None:
             mangadex_item.cover_url = ""
         else:
             mangadex_item.cover_url = f"https://uploads.mangadex.org/covers/" \
                                       f"{mangadex_item.mangadex_id}/{filename}"
+    return mangadex_items
@@ -17,46 +17,48 @@ You should have received a copy of the GNU General Public License
 along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
-import time
-import json
-import requests
-from requests import ConnectionError
-from requests.exceptions import ChunkedEncodingError
 from typing import Optional
-from jerrycan.base import app
 from otaku_info.enums import MediaType
 from otaku_info.external.entities.MyanimelistItem import MyanimelistItem
+from otaku_info.Config import Config
+from otaku_info.external.JikanClient import JikanClient
+from otaku_info.external.http import response_cache
+
+
+jikan_client = JikanClient()
+"""
+Jikan client shared by all requests to the jikan API.
+Jikan allows up to 30 requests per minute and 2 requests per second.
+"""
 
 
 def load_myanimelist_item(myanimelist_id: int, media_type: MediaType) \
         -> Optional[MyanimelistItem]:
     """
-    Loads myanimelist data using the jikan API
+    Loads myanimelist data using the jikan API.
+    Responses are cached for Config.MYANIMELIST_CACHE_TTL seconds,
+    IDs that jikan doesn't know are cached for
+    Config.NEGATIVE_CACHE_TTL seconds.
     :param myanimelist_id: The myanimelist ID
     :param media_type: The media type
     :return: The myanimelist item
     """
-    url = f"https://api.jikan.moe/v3/{media_type.value}/{myanimelist_id}"
-
-    try:
-        response = requests.get(url)
-    except (ChunkedEncodingError, ConnectionError):
-        return None
+    namespace = f"myanimelist-{media_type.value}"
+    key = str(myanimelist_id)
+    cached = response_cache.get_many(namespace, [key])
+    if key in cached:
+        data = cached[key]
+    else:
+        answered, data = \
+            jikan_client.fetch(f"{media_type.value}/{myanimelist_id}")
+        if data is not None:
+            response_cache.set(
+                namespace, key, data, Config.MYANIMELIST_CACHE_TTL
+            )
+        elif answered:
+            response_cache.set(namespace, key, None, Config.NEGATIVE_CACHE_TTL)
 
-    if response.status_code == 503:
-        # Sometimes jikan temporarily loses connection to myanimelist
-        time.sleep(2)
-        response = requests.get(url)
-    elif response.status_code >= 300:
+    if data is None:
         return None
-
-    data = json.loads(response.text)
-    if data["type"] == "BadResponseException":
-        return None
-    elif data["type"] == "RateLimitException":
-        app.logger.warning("Rate limited by jikan")
-        time.sleep(30)
-        return load_myanimelist_item(myanimelist_id, media_type)
-
     mal_item = MyanimelistItem.from_query(media_type, data)
     return mal_item
@@ -17,27 +17,175 @@ You should have received a copy of the GNU General Public License
 along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
-import requests
-from typing import List, Optional
+import hashlib
+import multiprocessing
+from typing import List, Optional, Tuple, Dict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from datetime import datetime
 from bs4 import BeautifulSoup
 from jerrycan.base import app
+from otaku_info.Config import Config
 from otaku_info.external.entities.RedditLnRelease import RedditLnRelease
+from otaku_info.external.http import http_get, response_cache
+from otaku_info.utils.html import parse_html
+
+WIKI_CACHE_TTL = 60 * 60 * 24 * 30
+"""
+The amount of seconds wiki pages and the releases parsed from them are
+cached. Cached pages are revalidated using conditional requests.
+"""
 
 
 def load_ln_releases(year: Optional[int] = None) -> List[RedditLnRelease]:
     """
-    Loads the light novel releases
+    Loads the light novel releases.
+    Wiki pages are only downloaded if they changed since they were last
+    downloaded and only parsed if no releases were parsed from the same
+    content before.
+    The wiki pages of all years are fetched concurrently and parsed in a
+    process pool. The releases are always ordered by year.
+    :param year: The year for which to load the releases.
+                 If not provided, all years are loaded.
+    :return: The light novel releases
+    """
+    current_year = datetime.utcnow().year
+    years = list(range(2018, current_year + 2)) if year is None else [year]
+
+    with ThreadPoolExecutor(len(years)) as executor:
+        pages = list(executor.map(load_wiki_page, years))
+
+    releases: Dict[int, List[RedditLnRelease]] = {}
+    unparsed: Dict[int, Tuple[str, str]] = {}
+    content_hashes: Dict[int, str] = {}
+    for page_year, page in zip(years, pages):
+        if page is None:
+            releases[page_year] = []
+            continue
+        url, body = page
+
+        content_hash = hashlib.sha256(
+            f"{page_year}|{current_year}|{url}|{body}".encode("utf-8")
+        ).hexdigest()
+        cached = response_cache.get("reddit-ln-releases", content_hash)
+        if cached is None:
+            unparsed[page_year] = page
+            content_hashes[page_year] = content_hash
+        else:
+            releases[page_year] = \
+                [RedditLnRelease.from_dict(x) for x in cached]
+
+    for page_year, parsed in __parse_pages(unparsed).items():
+        releases[page_year] = parsed
+        response_cache.set(
+            "reddit-ln-releases",
+            content_hashes[page_year],
+            [x.to_dict() for x in parsed],
+            WIKI_CACHE_TTL
+        )
+
+    return [release for x in years for release in releases[x]]
+
+
+def __parse_pages(
+        pages: Dict[int, Tuple[str, str]]
+) -> Dict[int, List[RedditLnRelease]]:
+    """
+    Parses the light novel releases of multiple wiki pages.
+    Uses a process pool with Config.LN_PARSE_WORKERS processes if more than
+    one page needs to be parsed.
+    The worker processes are spawned instead of forked, since forking the
+    multi-threaded server process may deadlock the workers. They only import
+    this module, which does not start the application.
+    :param pages: The URL and content of the wiki pages, keyed by year
+    :return: The light novel releases, keyed by year
+    """
+    workers = min(Config.LN_PARSE_WORKERS, len(pages))
+    if workers <= 1:
+        return {
+            year: parse_ln_releases(year, url, body)
+            for year, (url, body) in pages.items()
+        }
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=context) as executor:
+        futures = {
+            year: executor.submit(parse_ln_releases, year, url, body)
+            for year, (url, body) in pages.items()
+        }
+        return {year: future.result() for year, future in futures.items()}
+
+
+def load_wiki_page(year: int) -> Optional[Tuple[str, str]]:
+    """
+    Loads the wiki page containing the release data for a year.
+    If the page for the year does not exist yet, the upcoming releases page
+    is used instead.
+    :param year: The year for which to load the wiki page
+    :return: The URL and the content of the page, or None if no page exists
     """
-    releases: List[RedditLnRelease] = []
     current_year = datetime.utcnow().year
 
-    if year is None:
-        for year in range(2018, current_year + 2):
-            releases += load_ln_releases(year)
-        return releases
+    # TODO Parse years from 2015-2017
+    if year < 2018 or year > current_year + 1:
+        return None
+
+    url = f"https://old.reddit.com/r/LightNovels/wiki/{year}releases"
+    body = __fetch_page(url)
+
+    if body is None and year >= current_year:
+        url = "https://old.reddit.com/r/LightNovels/wiki/upcomingreleases"
+        body = __fetch_page(url)
 
-    tables = load_tables(year)
+    return None if body is None else (url, body)
+
+
+def __fetch_page(url: str) -> Optional[str]:
+    """
+    Fetches a page using a conditional request.
+    The content of the page is stored together with its ETag and
+    Last-Modified headers, so that unchanged pages don't need to be
+    downloaded again.
+    Redirects aren't followed, since reddit redirects missing wiki pages.
+    :param url: The URL of the page
+    :return: The content of the page, or None if the page could not be loaded
+    """
+    cached = response_cache.get("reddit-wiki", url)
+    headers = {"User-Agent": "Mozilla/5.0"}
+    if cached is not None:
+        if cached["etag"] is not None:
+            headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"] is not None:
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    resp = http_get(url, headers=headers, allow_redirects=False)
+    if resp.status_code == 304 and cached is not None:
+        app.logger.debug(f"{url} did not change")
+        return cached["body"]
+    elif resp.status_code >= 300:
+        return None
+
+    response_cache.set("reddit-wiki", url, {
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+        "body": resp.text
+    }, WIKI_CACHE_TTL)
+    return resp.text
+
+
+def parse_ln_releases(
+        year: int,
+        url: str,
+        body: str
+) -> List[RedditLnRelease]:
+    """
+    Parses the light novel releases of a wiki page
+    :param year: The year of the releases
+    :param url: The URL of the wiki page
+    :param body: The content of the wiki page
+    :return: The light novel releases
+    """
+    releases: List[RedditLnRelease] = []
+    tables = parse_tables(year, url, body)
 
     for i, table in enumerate(tables):
         month_number = i + 1
@@ -57,26 +205,16 @@ def load_ln_releases(year: Optional[int] = None) -> List[RedditLnRelease]:
     return releases
 
 
-def load_tables(year: int) -> List[BeautifulSoup]:
+def parse_tables(year: int, url: str, body: str) -> List[BeautifulSoup]:
     """
-    Loads the tables containing the release data
+    Parses the tables containing the release data
+    :param year: The year of the releases
+    :param url: The URL of the wiki page
+    :param body: The content of the wiki page
+    :return: The tables, one for each month
     """
     current_year = datetime.utcnow().year
-
-    # TODO Parse years from 2015-2017
-    if year < 2018 or year > current_year + 1:
-        return []
-
-    url = f"https://old.reddit.com/r/LightNovels/wiki/{year}releases"
-
-    if year >= current_year:
-        if requests.head(url).status_code >= 300:
-            url = "https://old.reddit.com/r/LightNovels/wiki/upcomingreleases"
-
-    headers = {"User-Agent": "Mozilla/5.0"}
-    resp = requests.get(url, headers=headers).text
-    soup = BeautifulSoup(resp, "html.parser")
-
+    soup = parse_html(body, ["tbody", "h3"])
     tables = soup.find_all("tbody")
 
     # Table 0: Releases for current month on side bar
@@ -106,6 +244,6 @@ def load_tables(year: int) -> List[BeautifulSoup]:
         tables = filtered
 
         while year == current_year and len(tables) < 12:
-            tables = [BeautifulSoup("")] + tables
+            tables = [parse_html("")] + tables
 
     return tables
@@ -18,6 +18,7 @@ along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
 from puffotter.env import load_env_file
+from jerrycan.base import app
 from jerrycan.initialize import init_flask
 from jerrycan.wsgi import start_server
 from otaku_info import sentry_dsn, root_path
@@ -25,6 +26,7 @@ from otaku_info.background import bg_tasks
 from otaku_info.Config import Config
 from otaku_info.routes import blueprint_generators
 from otaku_info.db import models
+from otaku_info.utils.migrations import migrate_database
 
 
 def main():
@@ -41,5 +43,7 @@ def main():
         models,
         blueprint_generators
     )
+    with app.app_context():
+        migrate_database()
 
     start_server(Config, bg_tasks)
@@ -22,6 +22,8 @@ from typing import List, Tuple, Callable
 from otaku_info.routes.external_service import define_blueprint \
     as __external_service
 from otaku_info.routes.api.media_api import define_blueprint as __media_api
+from otaku_info.routes.api.updates_api import define_blueprint as \
+    __updates_api
 from otaku_info.routes.notifications import define_blueprint as \
     __notifications
 from otaku_info.routes.media import define_blueprint as __media
@@ -32,6 +34,7 @@ from otaku_info.routes.updates import define_blueprint as __updates
 blueprint_generators: List[Tuple[Callable[[str], Blueprint], str]] = [
     (__external_service, "external_service"),
     (__media_api, "media_api"),
+    (__updates_api, "updates_api"),
     (__notifications, "notifications"),
     (__media, "media"),
     (__ln, "ln"),
@@ -0,0 +1,109 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+
+from typing import Dict, Any
+from flask import request, render_template, url_for
+from flask.blueprints import Blueprint
+from flask_login import login_required, current_user
+from jerrycan.routes.decorators import api, api_login_required
+from otaku_info.Config import Config
+from otaku_info.db.UpdateFeedEntry import UpdateFeedEntry
+from otaku_info.enums import MediaType, ListService, MediaSubType
+from otaku_info.utils.update_feed import load_update_feed_page
+
+
+def define_blueprint(blueprint_name: str) -> Blueprint:
+    """
+    Defines the blueprint for this route
+    :param blueprint_name: The name of the blueprint
+    :return: The blueprint
+    """
+    blueprint = Blueprint(blueprint_name, __name__)
+    api_base_path = f"/api/v{Config.API_VERSION}"
+
+    @blueprint.route(f"{api_base_path}/updates", methods=["GET"])
+    @api_login_required
+    @login_required
+    @api
+    def updates() -> Dict[str, Any]:
+        """
+        Retrieves a page of the user's updates for a specified service and
+        list. Accepts the same parameters as the /updates page, the next
+        page is specified using the cursor parameter.
+        :return: The updates, the rendered updates in the specified display
+                 mode and the cursor and URL of the next page
+        """
+        subtype_name = request.args.get("filter_subtype")
+        display_mode = request.args.get("display_mode", "grid")
+        entries, next_cursor = load_update_feed_page(
+            current_user,
+            request.args["list_name"],
+            ListService(request.args["service"]),
+            MediaType(request.args["media_type"]),
+            None if not subtype_name else MediaSubType(subtype_name),
+            int(request.args.get("mincount", "0")),
+            request.args.get("include_complete", "0") == "1",
+            request.args.get("cursor"),
+            Config.UPDATES_PAGE_SIZE
+        )
+
+        next_url = None
+        if next_cursor is not None:
+            params = dict(request.args)
+            params["cursor"] = next_cursor
+            next_url = url_for(f"{blueprint_name}.updates", **params)
+
+        template = {
+            "grid": "updates/update_grid.html",
+            "list": "updates/update_list.html"
+        }.get(display_mode, "updates/update_grid.html")
+
+        return {
+            "updates": [__serialize_update(x) for x in entries],
+            "html": render_template(template, updates=entries),
+            "next_cursor": next_cursor,
+            "next_url": next_url
+        }
+
+    return blueprint
+
+
+def __serialize_update(entry: UpdateFeedEntry) -> Dict[str, Any]:
+    """
+    Converts an update feed entry into a JSON-compatible dictionary
+    :param entry: The update feed entry
+    :return: The dictionary
+    """
+    return {
+        "service": entry.user_state_service.value,
+        "service_id": entry.user_state_service_id,
+        "media_type": entry.user_state_media_type.value,
+        "media_subtype": entry.media_subtype.value,
+        "title": entry.title,
+        "cover_url": entry.cover_url,
+        "url": entry.url,
+        "score": entry.score,
+        "progress": entry.progress,
+        "latest": entry.latest,
+        "diff": entry.diff,
+        "related_ids": {
+            x.service.value: x.service_id for x in entry.related_ids
+        }
+    }
@@ -17,9 +17,12 @@ You should have received a copy of the GNU General Public License
 along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
-from datetime import datetime
+import time
+from datetime import datetime, MINYEAR, MAXYEAR
+from typing import List, Tuple
 from flask import request, render_template, redirect, url_for
 from flask.blueprints import Blueprint
+from sqlalchemy import extract
 from jerrycan.base import db
 
 from otaku_info.db import MediaItem
@@ -27,6 +30,16 @@ from otaku_info.db.LnRelease import LnRelease
 from otaku_info.utils.dates import MONTHS, map_month_name_to_month_number, \
     map_month_number_to_month_name
 
+RELEASE_YEARS_CACHE_TTL = 60 * 60
+"""
+The amount of seconds the years in which LN releases exist are cached
+"""
+
+__release_years: Tuple[float, List[int]] = (0.0, [])
+"""
+The cached release years and the time at which they were loaded
+"""
+
 
 def define_blueprint(blueprint_name: str) -> Blueprint:
     """
@@ -58,26 +71,30 @@ def define_blueprint(blueprint_name: str) -> Blueprint:
                 month = map_month_name_to_month_number(month_string)
 
         now = datetime.utcnow()
+        if year is not None and not MINYEAR <= year < MAXYEAR:
+            year = now.year
+        if month is not None and not 1 <= month <= 12:
+            month = now.month
         if not (year is not None and month is None):
             if year is None:
                 year = now.year
             if month is None:
                 month = now.month
 
-        all_releases = LnRelease.query.options(
+        if month is None:
+            start = datetime(year, 1, 1)
+            end = datetime(year + 1, 1, 1)
+        else:
+            start = datetime(year, month, 1)
+            end = datetime(year + month // 12, month % 12 + 1, 1)
+
+        releases = LnRelease.query.filter(
+            LnRelease.release_date >= start,
+            LnRelease.release_date < end
+        ).order_by(LnRelease.release_date).options(
             db.joinedload(LnRelease.media_item)
             .subqueryload(MediaItem.id_mappings)
         ).all()
-        years = list(set([x.release_date.year for x in all_releases]))
-        years.sort()
-
-        releases = [
-            x for x in all_releases
-            if x.release_date.year == year
-        ]
-        if month is not None:
-            releases = [x for x in releases if x.release_date.month == month]
-        releases.sort(key=lambda x: x.release_date)
 
         if month is None:
             month_name = "all"
@@ -87,7 +104,7 @@ def define_blueprint(blueprint_name: str) -> Blueprint:
         return render_template(
             "ln/ln_releases.html",
             releases=releases,
-            years=[(x, x) for x in years],
+            years=[(x, x) for x in load_release_years()],
             months=[(x, x.title()) for x in MONTHS + ["all"]],
             selected_year=year,
             selected_month=month_name
@@ -104,3 +121,21 @@ def define_blueprint(blueprint_name: str) -> Blueprint:
         return redirect(get_url)
 
     return blueprint
+
+
+def load_release_years() -> List[int]:
+    """
+    Loads the years in which LN releases exist.
+    The result is cached for RELEASE_YEARS_CACHE_TTL seconds.
+    :return: The years, in ascending order
+    """
+    global __release_years
+    loaded_at, years = __release_years
+    if time.time() - loaded_at > RELEASE_YEARS_CACHE_TTL:
+        year = extract("year", LnRelease.release_date)
+        years = [
+            int(x) for x, in
+            db.session.query(year).distinct().order_by(year).all()
+        ]
+        __release_years = (time.time(), years)
+    return years
@@ -20,9 +20,10 @@ LICENSE"""
 from flask import request, render_template, redirect, url_for, flash
 from flask.blueprints import Blueprint
 from flask_login import login_required, current_user
+from otaku_info.Config import Config
 from otaku_info.enums import ListService, MediaType, MediaSubType
 from otaku_info.db.MediaList import MediaList
-from otaku_info.wrappers.UpdateWrapper import UpdateWrapper
+from otaku_info.utils.update_feed import load_update_feed_page
 
 
 def define_blueprint(blueprint_name: str) -> Blueprint:
@@ -63,7 +64,9 @@ def define_blueprint(blueprint_name: str) -> Blueprint:
     @login_required
     def show_updates():
         """
-        Shows the user's manga updates for a specified service and list
+        Shows the user's manga updates for a specified service and list.
+        The updates are paginated, the next page can be loaded
+        incrementally using the updates API.
         :return: The response
         """
         service_name = request.args.get("service")
@@ -107,22 +110,39 @@ def define_blueprint(blueprint_name: str) -> Blueprint:
                 flash("Invalid configuration", "danger")
                 return redirect(url_for("updates.show_updates"))
 
-            updates = UpdateWrapper.from_db(
-                current_user,
-                list_name,
-                service,
-                media_type,
-                subtype,
-                mincount,
-                include_complete
-            )
+            display_mode = request.args.get("display_mode", "grid")
+            try:
+                updates, next_cursor = load_update_feed_page(
+                    current_user,
+                    list_name,
+                    service,
+                    media_type,
+                    subtype,
+                    mincount,
+                    include_complete,
+                    request.args.get("cursor"),
+                    Config.UPDATES_PAGE_SIZE
+                )
+            except ValueError:
+                flash("Invalid page", "danger")
+                return redirect(url_for("updates.show_updates"))
+
+            next_url, next_api_url = None, None
+            if next_cursor is not None:
+                params = dict(request.args)
+                params["cursor"] = next_cursor
+                next_url = url_for("updates.show_updates", **params)
+                next_api_url = url_for("updates_api.updates", **params)
+
             return render_template(
                 "updates/updates.html",
                 updates=updates,
                 list_name=list_name,
                 service=service,
                 media_type=media_type,
-                display_mode=request.args.get("display_mode", "grid")
+                display_mode=display_mode,
+                next_url=next_url,
+                next_api_url=next_api_url
             )
 
     return blueprint
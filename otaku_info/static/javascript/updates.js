@@ -0,0 +1,44 @@
+/**
+ * Loads the next page of updates using the updates API and appends the
+ * rendered updates to the updates container.
+ * Falls back to regular navigation if the request fails.
+ * @param button The "Load more" button
+ * @returns {boolean} false, to prevent the default navigation
+ */
+function loadMoreUpdates(button) {
+    if (button.getAttribute("disabled") !== null) {
+        return false;
+    }
+    button.setAttribute("disabled", "");
+
+    fetch(button.getAttribute("data-api-url"), {credentials: "same-origin"})
+        .then(function(response) {
+            if (!response.ok) {
+                throw new Error(response.statusText);
+            }
+            return response.json();
+        })
+        .then(function(response) {
+            const data = response["data"];
+            document.getElementById("updates")
+                .insertAdjacentHTML("beforeend", data["html"]);
+
+            if (data["next_url"] === null) {
+                button.parentNode.removeChild(button);
+            } else {
+                const params = new URLSearchParams(
+                    window.location.search
+                );
+                params.set("cursor", data["next_cursor"]);
+                button.setAttribute("data-api-url", data["next_url"]);
+                button.setAttribute(
+                    "href", window.location.pathname + "?" + params
+                );
+                button.removeAttribute("disabled");
+            }
+        })
+        .catch(function() {
+            window.location.href = button.getAttribute("href");
+        });
+    return false;
+}
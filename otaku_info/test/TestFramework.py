@@ -17,6 +17,9 @@ You should have received a copy of the GNU General Public License
 along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
+import os
+import shutil
+import tempfile
 # noinspection PyProtectedMember
 from jerrycan.test.TestFramework import \
     _TestFramework as __TestFrameWork
@@ -24,6 +27,7 @@ from otaku_info.main import root_path
 from otaku_info.Config import Config
 from otaku_info.routes import blueprint_generators
 from otaku_info.db import models
+from otaku_info.external.http import response_cache
 
 
 class _TestFramework(__TestFrameWork):
@@ -35,3 +39,28 @@ class _TestFramework(__TestFrameWork):
     config = Config
     models = models
     blueprint_generators = blueprint_generators
+
+    def setUp(self):
+        """
+        Sets up the flask application and stores the response cache in a
+        temporary directory, so that cached responses aren't shared between
+        tests
+        :return: None
+        """
+        super().setUp()
+        self.response_cache_dir = tempfile.mkdtemp()
+        self.response_cache_path = Config.RESPONSE_CACHE_PATH
+        Config.RESPONSE_CACHE_PATH = os.path.join(
+            self.response_cache_dir, "response-cache.db"
+        )
+        response_cache.close()
+
+    def tearDown(self):
+        """
+        Removes the temporary response cache
+        :return: None
+        """
+        response_cache.close()
+        Config.RESPONSE_CACHE_PATH = self.response_cache_path
+        shutil.rmtree(self.response_cache_dir)
+        super().tearDown()
@@ -0,0 +1,77 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from unittest.mock import patch
+from otaku_info.db import MediaItem, MangaChapterGuess
+from otaku_info.enums import ListService, MediaType, MediaSubType, \
+    ReleasingState
+from otaku_info.background.anilist_manga_chapter_guesses import \
+    update_anilist_manga_chapter_guesses
+from otaku_info.test.TestFramework import _TestFramework
+
+
+class TestAnilistMangaChapterGuesses(_TestFramework):
+    """
+    Class that tests updating the anilist manga chapter guesses
+    """
+
+    def setUp(self):
+        """
+        Creates manga with existing chapter guesses
+        :return: None
+        """
+        super().setUp()
+        for service_id in ["1", "2"]:
+            self.db.session.add(MediaItem(
+                service=ListService.ANILIST,
+                service_id=service_id,
+                media_type=MediaType.MANGA,
+                media_subtype=MediaSubType.MANGA,
+                romaji_title=f"Title {service_id}",
+                cover_url="",
+                latest_release=10,
+                releasing_state=ReleasingState.RELEASING
+            ))
+            self.db.session.add(MangaChapterGuess(
+                service=ListService.ANILIST,
+                service_id=service_id,
+                media_type=MediaType.MANGA,
+                guess=10,
+                last_update=0
+            ))
+        self.db.session.commit()
+
+    def test_partially_failed_batch(self):
+        """
+        Tests that guesses whose query failed keep their previous values
+        :return: None
+        """
+        with patch(
+                "otaku_info.background.anilist_manga_chapter_guesses."
+                "guess_latest_manga_chapters",
+                return_value={1: 20}
+        ):
+            update_anilist_manga_chapter_guesses()
+
+        updated = MangaChapterGuess.query.filter_by(service_id="1").one()
+        failed = MangaChapterGuess.query.filter_by(service_id="2").one()
+        self.assertEqual(updated.guess, 20)
+        self.assertGreater(updated.last_update, 0)
+        self.assertEqual(failed.guess, 10)
+        self.assertEqual(failed.last_update, 0)
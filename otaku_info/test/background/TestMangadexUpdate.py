@@ -0,0 +1,125 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+from unittest.mock import patch
+from requests.exceptions import HTTPError
+from otaku_info.Config import Config
+from otaku_info.db import MediaItem, MediaIdMapping, SyncWatermark, \
+    UnresolvedMangadexReference
+from otaku_info.enums import ListService, MediaType, MediaSubType, \
+    ReleasingState
+from otaku_info.external.entities.MangadexItem import MangadexItem
+from otaku_info.external import mangadex as mangadex_api
+from otaku_info.background import mangadex
+from otaku_info.test.TestFramework import _TestFramework
+from otaku_info.test.external.TestHttp import DummyResponse
+
+
+class TestMangadexUpdate(_TestFramework):
+    """
+    Class that tests updating the mangadex data
+    """
+
+    def update(self, fetched: list, loaded: dict) -> list:
+        """
+        Runs the mangadex update using dummy API results
+        :param fetched: The mangadex items returned by the mangadex API
+        :param loaded: The anilist items returned by the anilist API
+        :return: The updated_since values used to fetch the mangadex items
+        """
+        updated_since = []
+
+        def fetch(since, _):
+            updated_since.append(since)
+            return iter(fetched)
+
+        media_item = MediaItem(
+            service=ListService.ANILIST,
+            service_id="5",
+            media_type=MediaType.MANGA,
+            media_subtype=MediaSubType.MANGA,
+            romaji_title="Title",
+            cover_url="",
+            releasing_state=ReleasingState.RELEASING
+        )
+        with patch.object(mangadex, "fetch_all_mangadex_items", fetch), \
+                patch.object(mangadex, "load_anilist_infos",
+                             return_value=loaded), \
+                patch.object(mangadex, "anime_list_item_to_media_item",
+                             return_value=media_item):
+            mangadex.update_mangadex_data()
+        return updated_since
+
+    def test_retrying_unresolved_items(self):
+        """
+        Tests that manga that could not be loaded are loaded during the
+        next incremental update
+        :return: None
+        """
+        item = MangadexItem(
+            "abc", {ListService.ANILIST: "5"}, "Title", "Title", "",
+            None, None, ReleasingState.RELEASING
+        )
+        self.assertEqual(self.update([item], {}), [None])
+        self.assertEqual(UnresolvedMangadexReference.query.count(), 1)
+        watermark = SyncWatermark.query.get(ListService.MANGADEX)
+        self.assertEqual(watermark.last_full_sync, watermark.timestamp)
+
+        timestamp = watermark.timestamp
+        self.assertEqual(self.update([], {5: None}), [timestamp])
+        self.assertEqual(UnresolvedMangadexReference.query.count(), 0)
+        mapping = MediaIdMapping.query.filter_by(
+            parent_service=ListService.ANILIST,
+            parent_service_id="5",
+            service=ListService.MANGADEX
+        ).one()
+        self.assertEqual(mapping.service_id, "abc")
+
+    def test_periodic_full_sync(self):
+        """
+        Tests that all mangadex items are fetched once the last full sync
+        is older than the full sync interval
+        :return: None
+        """
+        self.update([], {})
+        self.assertIsNotNone(self.update([], {})[0])
+        with patch.object(Config, "MANGADEX_FULL_SYNC_INTERVAL", 0):
+            self.assertEqual(self.update([], {}), [None])
+
+    def test_failed_page(self):
+        """
+        Tests that the watermark isn't moved if a page could not be fetched
+        :return: None
+        """
+        self.db.session.add(SyncWatermark(
+            service=ListService.MANGADEX,
+            timestamp=1000,
+            last_full_sync=int(time.time())
+        ))
+        self.db.session.commit()
+
+        with patch.object(mangadex_api, "http_get",
+                          return_value=DummyResponse(429)):
+            with self.assertRaises(HTTPError):
+                mangadex.update_mangadex_data()
+
+        self.db.session.expire_all()
+        watermark = SyncWatermark.query.get(ListService.MANGADEX)
+        self.assertEqual(watermark.timestamp, 1000)
@@ -17,8 +17,11 @@ You should have received a copy of the GNU General Public License
 along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
-from otaku_info.enums import MediaType
-from otaku_info.external.anilist import load_anilist_info
+from unittest.mock import patch
+from otaku_info.enums import MediaType, ListService
+from otaku_info.external import anilist
+from otaku_info.external.anilist import load_anilist_info, \
+    load_anilist_infos, guess_latest_manga_chapters
 from otaku_info.test.TestFramework import _TestFramework
 
 
@@ -35,3 +38,38 @@ class TestAnilist(_TestFramework):
         item = load_anilist_info(9253, MediaType.ANIME)
         self.assertIsNotNone(item)
         self.assertEqual(item.english_title, "Steins;Gate")
+
+    def test_retrieving_multiple_anilist_items(self):
+        """
+        Tests retrieving multiple anilist items in a single batch
+        :return: None
+        """
+        items = load_anilist_infos([9253, 21, 0], MediaType.ANIME)
+        self.assertEqual(set(items.keys()), {9253, 21})
+        self.assertEqual(items[9253].english_title, "Steins;Gate")
+
+        items = load_anilist_infos(
+            [9253], MediaType.ANIME, ListService.MYANIMELIST
+        )
+        self.assertEqual(items[9253].english_title, "Steins;Gate")
+
+    def test_guessing_latest_manga_chapters(self):
+        """
+        Tests guessing the latest chapters of multiple manga in one batch
+        :return: None
+        """
+        guesses = guess_latest_manga_chapters([30013, 30002])
+        self.assertEqual(set(guesses.keys()), {30013, 30002})
+        self.assertGreater(guesses[30013], 1000)
+
+    def test_caching_unknown_ids(self):
+        """
+        Tests that IDs that anilist doesn't know aren't requested again
+        :return: None
+        """
+        response = {"data": {"Page": {"media": []}}}
+        with patch.object(anilist, "query_anilist",
+                          return_value=response) as query:
+            self.assertEqual(load_anilist_infos([1], MediaType.MANGA), {})
+            self.assertEqual(load_anilist_infos([1], MediaType.MANGA), {})
+        self.assertEqual(query.call_count, 1)
@@ -0,0 +1,91 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from threading import Thread
+from typing import Dict, Optional
+from otaku_info.Config import Config
+from otaku_info.external.http import get_http_session
+from otaku_info.test.TestFramework import _TestFramework
+
+
+class DummyResponse:
+    """
+    Dummy HTTP response used to test external API clients
+    """
+
+    def __init__(
+            self,
+            status_code: int,
+            text: str = "",
+            headers: Optional[Dict[str, str]] = None
+    ):
+        """
+        Initializes the dummy response
+        :param status_code: The status code of the response
+        :param text: The content of the response
+        :param headers: The headers of the response
+        """
+        self.status_code = status_code
+        self.text = text
+        self.headers = {} if headers is None else headers
+
+
+class TestHttp(_TestFramework):
+    """
+    Class that tests the shared HTTP session
+    """
+
+    def test_session_is_shared(self):
+        """
+        Tests that all threads share the same HTTP session
+        :return: None
+        """
+        sessions = []
+        threads = [
+            Thread(target=lambda: sessions.append(get_http_session()))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(sessions), 4)
+        for session in sessions:
+            self.assertIs(session, get_http_session())
+
+    def test_session_configuration(self):
+        """
+        Tests that the session's connection pools and retries are configured
+        :return: None
+        """
+        adapter = get_http_session().get_adapter("https://graphql.anilist.co")
+        self.assertEqual(adapter.max_retries.total, Config.HTTP_RETRIES)
+        self.assertIn(429, adapter.max_retries.status_forcelist)
+        self.assertEqual(adapter._pool_maxsize, Config.HTTP_POOL_SIZE)
+
+    def test_session_without_retries(self):
+        """
+        Tests that a separate session without automatic retries is available
+        :return: None
+        """
+        session = get_http_session(retry=False)
+        self.assertIsNot(session, get_http_session())
+        self.assertIs(session, get_http_session(retry=False))
+        adapter = session.get_adapter("https://api.jikan.moe")
+        self.assertEqual(adapter.max_retries.total, 0)
@@ -0,0 +1,162 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import json
+from typing import List, Dict, Any, Tuple, Optional
+from unittest.mock import patch
+from requests.exceptions import RequestException
+from otaku_info.Config import Config
+from otaku_info.external.JikanClient import JikanClient
+from otaku_info.test.TestFramework import _TestFramework
+from otaku_info.test.external.TestHttp import DummyResponse
+
+
+class TestJikanClient(_TestFramework):
+    """
+    Class that tests the jikan API client
+    """
+
+    def setUp(self):
+        """
+        Sets up the jikan client and disables waiting between retries
+        :return: None
+        """
+        super().setUp()
+        self.jikan = JikanClient(per_second=1000, per_minute=60000)
+        self.max_backoff = Config.JIKAN_MAX_BACKOFF
+        Config.JIKAN_MAX_BACKOFF = 0
+
+    def tearDown(self):
+        """
+        Restores the configuration
+        :return: None
+        """
+        Config.JIKAN_MAX_BACKOFF = self.max_backoff
+        super().tearDown()
+
+    @staticmethod
+    def json_response(
+            status_code: int,
+            data: Dict[str, Any],
+            headers: Optional[Dict[str, str]] = None
+    ) -> DummyResponse:
+        """
+        Generates a dummy response containing JSON data
+        :param status_code: The status code of the response
+        :param data: The JSON data of the response
+        :param headers: The headers of the response
+        :return: The dummy response
+        """
+        return DummyResponse(status_code, json.dumps(data), headers)
+
+    def request(self, responses: List[Any]) -> Any:
+        """
+        Executes a request with a sequence of dummy responses
+        :param responses: The responses or exceptions to return, in order
+        :return: The result of the request
+        """
+        return self.fetch(responses)[1]
+
+    def fetch(self, responses: List[Any]) -> Tuple[bool, Any]:
+        """
+        Fetches data with a sequence of dummy responses
+        :param responses: The responses or exceptions to return, in order
+        :return: Whether jikan answered the request and the result of the
+                 request
+        """
+        def http_get(*_, **__):
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        with patch("otaku_info.external.JikanClient.http_get", http_get):
+            return self.jikan.fetch("manga/1")
+
+    def test_successful_request(self):
+        """
+        Tests a successful request
+        :return: None
+        """
+        data = self.request([self.json_response(200, {"mal_id": 1})])
+        self.assertEqual(data, {"mal_id": 1})
+        self.assertEqual(self.jikan.metrics()["requests"], 1)
+        self.assertEqual(self.jikan.metrics()["retries"], 0)
+
+    def test_retrying_requests(self):
+        """
+        Tests that throttled and failed requests are retried
+        :return: None
+        """
+        data = self.request([
+            self.json_response(503, {}),
+            RequestException(),
+            self.json_response(200, {"type": "RateLimitException"}),
+            self.json_response(200, {"mal_id": 1})
+        ])
+        self.assertEqual(data, {"mal_id": 1})
+        metrics = self.jikan.metrics()
+        self.assertEqual(metrics["requests"], 4)
+        self.assertEqual(metrics["retries"], 3)
+        self.assertEqual(metrics["rate_limited"], 1)
+
+    def test_retry_limit(self):
+        """
+        Tests that requests are only retried a limited amount of times
+        :return: None
+        """
+        responses = [
+            self.json_response(429, {}, {"Retry-After": "0"})
+            for _ in range(Config.JIKAN_MAX_RETRIES + 2)
+        ]
+        self.assertIsNone(self.request(responses))
+        self.assertEqual(len(responses), 1)
+        metrics = self.jikan.metrics()
+        self.assertEqual(metrics["retries"], Config.JIKAN_MAX_RETRIES)
+        self.assertEqual(metrics["failures"], 1)
+
+    def test_invalid_requests(self):
+        """
+        Tests that invalid requests aren't retried
+        :return: None
+        """
+        self.assertIsNone(self.request([self.json_response(404, {})]))
+        self.assertIsNone(self.request([
+            self.json_response(200, {"type": "BadResponseException"})
+        ]))
+        self.assertEqual(self.jikan.metrics()["retries"], 0)
+
+    def test_invalid_json(self):
+        """
+        Tests that responses that aren't valid JSON are retried and never
+        treated as unknown IDs
+        :return: None
+        """
+        data = self.request([
+            DummyResponse(200, "invalid"),
+            self.json_response(200, {"mal_id": 1})
+        ])
+        self.assertEqual(data, {"mal_id": 1})
+        self.assertEqual(self.jikan.metrics()["retries"], 1)
+
+        responses = [
+            DummyResponse(200, "invalid")
+            for _ in range(Config.JIKAN_MAX_RETRIES + 1)
+        ]
+        self.assertEqual(self.fetch(responses), (False, None))
@@ -17,8 +17,23 @@ You should have received a copy of the GNU General Public License
 along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
-from otaku_info.external.reddit import load_ln_releases
+from datetime import datetime
+from unittest.mock import patch
+from otaku_info.Config import Config
+from otaku_info.external import reddit
+from otaku_info.external.reddit import load_ln_releases, load_wiki_page
 from otaku_info.test.TestFramework import _TestFramework
+from otaku_info.test.external.TestHttp import DummyResponse
+
+
+DUMMY_PAGE = "<html>" + "<table><tbody></tbody></table>" * 2 + \
+    "<table><tbody><tr>" \
+    "<td>Jan 10</td><td>A</td><td>1</td><td>B</td><td>Digital</td>" \
+    "</tr></tbody></table>" \
+    "<table><tbody></tbody></table></html>"
+"""
+Wiki page containing a single release in january
+"""
 
 
 class TestReddit(_TestFramework):
@@ -37,3 +52,86 @@ class TestReddit(_TestFramework):
             items[0].series_name,
             "The Master of Ragnarok & Blesser of Einherjar"
         )
+
+    def test_conditional_fetching(self):
+        """
+        Tests that unchanged wiki pages are neither downloaded nor parsed
+        again
+        :return: None
+        """
+        responses = [
+            DummyResponse(200, DUMMY_PAGE, {"ETag": "abc"}),
+            DummyResponse(304)
+        ]
+        with patch.object(reddit, "http_get",
+                          side_effect=responses) as http_get, \
+                patch.object(reddit, "parse_ln_releases",
+                             wraps=reddit.parse_ln_releases) as parse:
+            first = load_ln_releases(2019)
+            second = load_ln_releases(2019)
+
+        self.assertEqual(parse.call_count, 1)
+        self.assertEqual(
+            http_get.call_args[1]["headers"]["If-None-Match"], "abc"
+        )
+        self.assertEqual(len(first), 1)
+        self.assertEqual(
+            [x.to_dict() for x in first],
+            [x.to_dict() for x in second]
+        )
+        self.assertEqual(second[0].series_name, "A")
+        self.assertEqual(second[0].release_date.month, 1)
+
+    def test_redirected_wiki_page(self):
+        """
+        Tests that the upcoming releases page is used if the wiki page of
+        the current year redirects to another page
+        :return: None
+        """
+        def get(url: str, **kwargs) -> DummyResponse:
+            """
+            Redirects the current year's page unless redirects are followed
+            :param url: The URL
+            :param kwargs: The request arguments
+            :return: The response
+            """
+            if url.endswith("upcomingreleases"):
+                return DummyResponse(200, DUMMY_PAGE)
+            elif kwargs.get("allow_redirects", True):
+                return DummyResponse(200, "<html>Page not found</html>")
+            return DummyResponse(302)
+
+        with patch.object(reddit, "http_get", side_effect=get):
+            page = load_wiki_page(datetime.utcnow().year)
+        self.assertIsNotNone(page)
+        self.assertTrue(page[0].endswith("upcomingreleases"))
+        self.assertEqual(page[1], DUMMY_PAGE)
+
+    def test_loading_all_years(self):
+        """
+        Tests that the releases of all years are loaded in parallel and
+        returned in order
+        :return: None
+        """
+        def get(url: str, **_) -> DummyResponse:
+            """
+            Generates a page with a release named after the year in the URL
+            :param url: The URL
+            :return: The response
+            """
+            year = url.rsplit("/", 1)[1].replace("releases", "")
+            return DummyResponse(200, DUMMY_PAGE.replace(">A<", f">{year}<"))
+
+        current_year = datetime.utcnow().year
+        years = [str(x) for x in range(2018, current_year + 2)]
+        parse_workers = Config.LN_PARSE_WORKERS
+        Config.LN_PARSE_WORKERS = 2
+        try:
+            with patch.object(reddit, "http_get", side_effect=get):
+                releases = load_ln_releases()
+                self.assertEqual([x.series_name for x in releases], years)
+                self.assertEqual(
+                    [x.series_name for x in load_ln_releases()], years
+                )
+        finally:
+            Config.LN_PARSE_WORKERS = parse_workers
@@ -0,0 +1,118 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+
+from datetime import datetime
+from unittest.mock import patch
+from otaku_info.db.LnRelease import LnRelease
+from otaku_info.routes import ln
+from otaku_info.test.TestFramework import _TestFramework
+
+
+class TestLnRoute(_TestFramework):
+    """
+    Class that tests the light novel routes
+    """
+
+    def setUp(self):
+        """
+        Adds LN releases to the database
+        :return: None
+        """
+        super().setUp()
+        for year, month, day in [
+            (2019, 12, 31), (2020, 1, 1), (2020, 3, 15),
+            (2020, 3, 2), (2020, 12, 31), (2021, 1, 1)
+        ]:
+            date = datetime(year, month, day)
+            self.db.session.add(LnRelease(
+                series_name=f"Series {date.strftime('%Y%m%d')}",
+                volume="1",
+                volume_number=1,
+                digital=True,
+                physical=False,
+                release_date_string=date.strftime("%Y-%m-%d"),
+                release_date=date
+            ))
+        self.db.session.commit()
+
+    def get_series_names(self, query: str) -> list:
+        """
+        Retrieves the names of the series on the LN releases page
+        :param query: The query string of the request
+        :return: The series names in the order they are displayed
+        """
+        with patch.object(ln, "RELEASE_YEARS_CACHE_TTL", -1):
+            resp = self.client.get(f"/ln/releases?{query}")
+        self.assertEqual(resp.status_code, 200)
+        page = resp.data.decode("utf-8")
+        names = [x.split()[0] for x in page.split("Series ")[1:]]
+        return names
+
+    def test_filtering_by_month(self):
+        """
+        Tests that only the releases of the selected month are displayed,
+        ordered by their release date
+        :return: None
+        """
+        self.assertEqual(
+            self.get_series_names("year=2020&month=3"),
+            ["20200302", "20200315"]
+        )
+        self.assertEqual(
+            self.get_series_names("year=2020&month=december"),
+            ["20201231"]
+        )
+
+    def test_filtering_by_year(self):
+        """
+        Tests that all releases of a year are displayed if no month is
+        selected
+        :return: None
+        """
+        self.assertEqual(
+            self.get_series_names("year=2020&month=all"),
+            ["20200101", "20200302", "20200315", "20201231"]
+        )
+
+    def test_invalid_dates(self):
+        """
+        Tests that invalid months and years fall back to the current
+        month and year
+        :return: None
+        """
+        with patch.object(ln, "datetime", wraps=datetime) as mock:
+            mock.utcnow.return_value = datetime(2020, 3, 1)
+            for query in ["year=2020&month=0", "year=2020&month=13"]:
+                self.assertEqual(
+                    self.get_series_names(query), ["20200302", "20200315"]
+                )
+            for query in ["year=0&month=all", "year=99999&month=all"]:
+                self.assertEqual(
+                    self.get_series_names(query),
+                    ["20200101", "20200302", "20200315", "20201231"]
+                )
+
+    def test_release_years(self):
+        """
+        Tests loading the years in which releases exist
+        :return: None
+        """
+        with patch.object(ln, "RELEASE_YEARS_CACHE_TTL", -1):
+            self.assertEqual(ln.load_release_years(), [2019, 2020, 2021])
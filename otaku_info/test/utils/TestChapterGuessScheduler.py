@@ -0,0 +1,113 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from otaku_info.db.MangaChapterGuess import MangaChapterGuess
+from otaku_info.db.MangaChapterGuessHistory import MangaChapterGuessHistory
+from otaku_info.enums import ListService, MediaType, ReleasingState
+from otaku_info.utils.ChapterGuessScheduler import ChapterGuessScheduler
+from otaku_info.test.TestFramework import _TestFramework
+
+
+class TestChapterGuessScheduler(_TestFramework):
+    """
+    Class that tests the prioritization of manga chapter guess updates
+    """
+
+    NOW = 100 * ChapterGuessScheduler.WEEK
+    """
+    The time used as the current time in the tests
+    """
+
+    @staticmethod
+    def generate_guess(service_id: str, last_update: int) -> MangaChapterGuess:
+        """
+        Generates a chapter guess for use in tests
+        :param service_id: The service ID of the guess
+        :param last_update: The time the guess was last updated
+        :return: The chapter guess
+        """
+        return MangaChapterGuess(
+            service=ListService.ANILIST,
+            service_id=service_id,
+            media_type=MediaType.MANGA,
+            last_update=last_update
+        )
+
+    def test_ordering(self):
+        """
+        Tests that the guesses are ordered by their priority
+        :return: None
+        """
+        day = 60 * 60 * 24
+        active = MangaChapterGuessHistory(
+            first_update=self.NOW - 10 * ChapterGuessScheduler.WEEK,
+            last_change=self.NOW - day,
+            change_count=10
+        )
+        inactive = MangaChapterGuessHistory(
+            first_update=self.NOW - 10 * ChapterGuessScheduler.WEEK,
+            last_change=self.NOW - 9 * ChapterGuessScheduler.WEEK,
+            change_count=1
+        )
+        scheduler = ChapterGuessScheduler(now=self.NOW)
+        scheduler.push(
+            self.generate_guess("finished", self.NOW - day),
+            ReleasingState.FINISHED, 5, inactive
+        )
+        scheduler.push(
+            self.generate_guess("inactive", self.NOW - day),
+            ReleasingState.RELEASING, 5, inactive
+        )
+        scheduler.push(
+            self.generate_guess("active", self.NOW - day),
+            ReleasingState.RELEASING, 5, active
+        )
+        scheduler.push(
+            self.generate_guess("popular", self.NOW - day),
+            ReleasingState.RELEASING, 50, active
+        )
+        scheduler.push(
+            self.generate_guess("new", 0),
+            ReleasingState.FINISHED, 0, None
+        )
+        scheduler.push(
+            self.generate_guess("recent", self.NOW - 60),
+            ReleasingState.RELEASING, 50, active
+        )
+
+        self.assertEqual(
+            [x.service_id for x in scheduler.pop(10)],
+            ["new", "popular", "active", "inactive", "finished"]
+        )
+
+    def test_budget(self):
+        """
+        Tests that only the requested amount of guesses is returned
+        :return: None
+        """
+        scheduler = ChapterGuessScheduler(now=self.NOW)
+        for i in range(10):
+            scheduler.push(
+                self.generate_guess(str(i), self.NOW - i * 60 * 60 * 2),
+                ReleasingState.RELEASING, 1, None
+            )
+        self.assertEqual(
+            [x.service_id for x in scheduler.pop(3)], ["9", "8", "7"]
+        )
+        self.assertEqual(len(scheduler.pop(100)), 6)
@@ -0,0 +1,119 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from otaku_info.db.MediaItem import MediaItem
+from otaku_info.db.MangaChapterGuess import MangaChapterGuess
+from otaku_info.enums import ListService, MediaType, MediaSubType, \
+    ReleasingState
+from otaku_info.utils.db import upsert_entries
+from otaku_info.test.TestFramework import _TestFramework
+
+
+class TestDb(_TestFramework):
+    """
+    Class that tests the database utility functions
+    """
+
+    @staticmethod
+    def generate_media_item(service_id: str, title: str) -> MediaItem:
+        """
+        Generates a media item for use in tests
+        :param service_id: The service ID of the media item
+        :param title: The title of the media item
+        :return: The media item
+        """
+        return MediaItem(
+            service=ListService.ANILIST,
+            service_id=service_id,
+            media_type=MediaType.MANGA,
+            media_subtype=MediaSubType.MANGA,
+            romaji_title=title,
+            cover_url="",
+            releasing_state=ReleasingState.RELEASING
+        )
+
+    def test_upserting_entries(self):
+        """
+        Tests inserting and updating entries in bulk
+        :return: None
+        """
+        upsert_entries(MediaItem, [
+            self.generate_media_item(str(x), "A") for x in range(500)
+        ])
+        self.db.session.commit()
+        self.assertEqual(MediaItem.query.count(), 500)
+
+        upsert_entries(MediaItem, [
+            self.generate_media_item(str(x), "B") for x in range(250, 750)
+        ])
+        self.db.session.commit()
+        self.db.session.expire_all()
+
+        items = {x.service_id: x for x in MediaItem.query.all()}
+        self.assertEqual(len(items), 750)
+        self.assertEqual(items["0"].romaji_title, "A")
+        self.assertEqual(items["249"].romaji_title, "A")
+        self.assertEqual(items["250"].romaji_title, "B")
+        self.assertEqual(items["749"].romaji_title, "B")
+
+    def test_upserting_duplicate_entries(self):
+        """
+        Tests that the last entry wins if a primary key occurs multiple times
+        :return: None
+        """
+        upsert_entries(MediaItem, [
+            self.generate_media_item("1", "A"),
+            self.generate_media_item("1", "B")
+        ])
+        self.db.session.commit()
+        items = MediaItem.query.all()
+        self.assertEqual(len(items), 1)
+        self.assertEqual(items[0].romaji_title, "B")
+
+    def test_upserting_keeps_unset_columns(self):
+        """
+        Tests that column defaults are applied to new rows and that columns
+        that weren't set aren't overwritten for existing rows
+        :return: None
+        """
+        upsert_entries(MediaItem, [self.generate_media_item("1", "A")])
+        upsert_entries(MangaChapterGuess, [MangaChapterGuess(
+            service=ListService.ANILIST,
+            service_id="1",
+            media_type=MediaType.MANGA,
+            guess=10
+        )])
+        self.db.session.commit()
+        guess = MangaChapterGuess.query.one()
+        self.assertEqual(guess.last_update, 0)
+
+        guess.last_update = 100
+        self.db.session.commit()
+        upsert_entries(MangaChapterGuess, [MangaChapterGuess(
+            service=ListService.ANILIST,
+            service_id="1",
+            media_type=MediaType.MANGA,
+            guess=20
+        )])
+        self.db.session.commit()
+        self.db.session.expire_all()
+
+        guess = MangaChapterGuess.query.one()
+        self.assertEqual(guess.guess, 20)
+        self.assertEqual(guess.last_update, 100)
@@ -0,0 +1,46 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+
+from unittest import TestCase
+from otaku_info.utils.html import parse_html, HTML_PARSER
+
+
+class TestHtml(TestCase):
+    """
+    Class that tests the HTML parsing functions
+    """
+
+    def test_parsing_only_some_tags(self):
+        """
+        Tests that only the requested tags are parsed, using both the
+        builtin parser and the default parser
+        :return: None
+        """
+        body = "<html><body><div><p>A</p><table><tbody><tr><td>B</td>" \
+               "</tr></tbody></table></div><h3>C</h3></body></html>"
+        for parser in {"html.parser", HTML_PARSER}:
+            soup = parse_html(body, ["tbody", "h3"], parser)
+            self.assertEqual(len(soup.find_all("p")), 0)
+            self.assertEqual(len(soup.find_all("div")), 0)
+            self.assertEqual(soup.find("tbody").find("td").text, "B")
+            self.assertEqual(soup.find("h3").text, "C")
+
+            soup = parse_html(body, parser=parser)
+            self.assertEqual(soup.find("p").text, "A")
@@ -0,0 +1,88 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+
+from datetime import datetime
+from sqlalchemy.inspection import inspect
+from otaku_info.db.LnRelease import LnRelease
+from otaku_info.utils.migrations import migrate_database
+from otaku_info.test.TestFramework import _TestFramework
+
+
+class TestMigrations(_TestFramework):
+    """
+    Class that tests the database migrations
+    """
+
+    def test_migrating_ln_releases(self):
+        """
+        Tests adding and backfilling the parsed LN release columns
+        :return: None
+        """
+        self.db.session.execute("DROP TABLE ln_releases")
+        self.db.session.execute(
+            "CREATE TABLE ln_releases ("
+            "series_name VARCHAR(255) NOT NULL, "
+            "volume VARCHAR(255) NOT NULL, "
+            "digital BOOLEAN NOT NULL, "
+            "physical BOOLEAN NOT NULL, "
+            "release_date_string VARCHAR(10) NOT NULL, "
+            "publisher VARCHAR(255), "
+            "purchase_link VARCHAR(255), "
+            "service VARCHAR(11), "
+            "service_id VARCHAR(255), "
+            "media_type VARCHAR(5), "
+            "PRIMARY KEY (series_name, volume, digital, physical))"
+        )
+        for i in range(1500):
+            self.db.session.execute(
+                "INSERT INTO ln_releases (series_name, volume, digital, "
+                "physical, release_date_string) VALUES "
+                f"('A', 'Vol {i}', 1, 0, '2020-03-{i % 28 + 1:02}')"
+            )
+        self.db.session.commit()
+
+        migrate_database()
+        migrate_database()
+
+        inspector = inspect(self.db.engine)
+        self.assertIn("ix_ln_releases_release_date", [
+            x["name"] for x in inspector.get_indexes("ln_releases")
+        ])
+        releases = {x.volume: x for x in LnRelease.query.all()}
+        self.assertEqual(len(releases), 1500)
+        self.assertEqual(releases["Vol 30"].volume_number, 30)
+        self.assertEqual(
+            releases["Vol 30"].release_date, datetime(2020, 3, 3)
+        )
+
+    def test_parsing_volume_numbers(self):
+        """
+        Tests parsing volume numbers
+        :return: None
+        """
+        for volume, number in [
+            ("5", 5),
+            ("Vol 12", 12),
+            ("1-3", 3),
+            ("2.5", 2),
+            ("P2 V4", 4),
+            ("Short Stories", 0)
+        ]:
+            self.assertEqual(LnRelease.parse_volume_number(volume), number)
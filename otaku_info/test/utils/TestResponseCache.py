@@ -0,0 +1,105 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+from otaku_info.utils.ResponseCache import ResponseCache
+from otaku_info.test.TestFramework import _TestFramework
+
+
+class TestResponseCache(_TestFramework):
+    """
+    Class that tests the persistent response cache
+    """
+
+    def setUp(self):
+        """
+        Creates a cache in the temporary response cache file
+        :return: None
+        """
+        super().setUp()
+        self.cache = ResponseCache(max_size=3)
+
+    def tearDown(self):
+        """
+        Closes the cache
+        :return: None
+        """
+        self.cache.close()
+        super().tearDown()
+
+    def test_caching(self):
+        """
+        Tests storing and retrieving entries
+        :return: None
+        """
+        self.assertIsNone(self.cache.get("a", "1"))
+        self.cache.set("a", "1", {"value": 1}, 60)
+        self.cache.set_many("b", {"1": [2], "2": [3]}, 60)
+        self.assertEqual(self.cache.get("a", "1"), {"value": 1})
+        self.assertEqual(
+            self.cache.get_many("b", ["1", "2", "3"]), {"1": [2], "2": [3]}
+        )
+        self.assertEqual(self.cache.stats(), {
+            "a": {"hits": 1, "misses": 1},
+            "b": {"hits": 2, "misses": 1}
+        })
+
+    def test_persistence(self):
+        """
+        Tests that entries survive reopening the cache
+        :return: None
+        """
+        self.cache.set("a", "1", 1, 60)
+        other = ResponseCache(max_size=3)
+        self.assertEqual(other.get("a", "1"), 1)
+        other.close()
+
+    def test_expiration(self):
+        """
+        Tests that expired entries aren't returned
+        :return: None
+        """
+        self.cache.set("a", "1", 1, 1)
+        self.cache.set("a", "2", 2, 60)
+        time.sleep(1.1)
+        self.assertEqual(self.cache.get_many("a", ["1", "2"]), {"2": 2})
+
+    def test_lru_eviction(self):
+        """
+        Tests that the least recently used entries are evicted
+        :return: None
+        """
+        for key in ["1", "2", "3"]:
+            self.cache.set("a", key, key, 60)
+            time.sleep(0.01)
+        self.cache.get("a", "1")
+        self.cache.set("a", "4", "4", 60)
+        self.assertEqual(
+            self.cache.get_many("a", ["1", "2", "3", "4"]),
+            {"1": "1", "3": "3", "4": "4"}
+        )
+
+    def test_disabled_cache(self):
+        """
+        Tests that nothing is cached if the maximum size is 0
+        :return: None
+        """
+        cache = ResponseCache(max_size=0)
+        cache.set("a", "1", 1, 60)
+        self.assertIsNone(cache.get("a", "1"))
@@ -0,0 +1,81 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+from threading import Thread
+from unittest import TestCase
+from otaku_info.utils.TokenBucket import TokenBucket
+
+
+class TestTokenBucket(TestCase):
+    """
+    Class that tests the token bucket rate limiter
+    """
+
+    def test_burst(self):
+        """
+        Tests that a full bucket allows a burst of requests without waiting
+        :return: None
+        """
+        bucket = TokenBucket(1, 5)
+        start = time.monotonic()
+        for _ in range(5):
+            bucket.acquire()
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_rate_limiting(self):
+        """
+        Tests that requests are limited to the configured rate once the
+        bucket is empty, even if multiple threads share the bucket
+        :return: None
+        """
+        bucket = TokenBucket(50, 1)
+        bucket.acquire()
+        start = time.monotonic()
+        threads = [
+            Thread(target=lambda: [bucket.acquire() for _ in range(5)])
+            for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+
+    def test_synchronizing(self):
+        """
+        Tests that the bucket never holds more tokens than the API reports
+        :return: None
+        """
+        bucket = TokenBucket(50, 10)
+        bucket.synchronize(0)
+        start = time.monotonic()
+        bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.015)
+
+    def test_pausing(self):
+        """
+        Tests that no tokens are handed out while the bucket is paused
+        :return: None
+        """
+        bucket = TokenBucket(1000, 10)
+        bucket.pause(0.2)
+        start = time.monotonic()
+        bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
@@ -0,0 +1,311 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+
+from datetime import datetime
+from typing import Optional
+from unittest import mock
+from jerrycan.db.User import User
+from otaku_info.Config import Config
+from otaku_info.db import MediaItem, MediaList, MediaListItem, \
+    MediaUserState, MangaChapterGuess, LnRelease, UpdateFeedEntry
+from otaku_info.enums import ListService, MediaType, MediaSubType, \
+    ReleasingState, ConsumingState
+from otaku_info.utils.update_feed import refresh_update_feed, \
+    load_update_feed, load_update_feed_page
+from otaku_info.wrappers.UpdateWrapper import UpdateWrapper
+from otaku_info.test.TestFramework import _TestFramework
+
+
+class TestUpdateFeed(_TestFramework):
+    """
+    Class that tests the update feed
+    """
+
+    def setUp(self):
+        """
+        Creates a manga list containing manga and light novels
+        :return: None
+        """
+        super().setUp()
+        self.user, self.password, _ = self.generate_sample_user()
+        self.media_list = MediaList(
+            service=ListService.ANILIST,
+            media_type=MediaType.MANGA,
+            user_id=self.user.id,
+            name="Reading"
+        )
+        self.db.session.add(self.media_list)
+
+        self.add_item("1", MediaSubType.MANGA, 10, 5, 8)
+        self.add_item("2", MediaSubType.MANGA, 20, 15, None)
+        self.add_item("3", MediaSubType.MANGA, 30, 30, 3,
+                      ReleasingState.FINISHED)
+        self.add_item("4", MediaSubType.NOVEL, 3, 1, None)
+        self.add_item("5", MediaSubType.MANGA, 40, 1, None, score=None)
+        for volume, year in [(4, 2020), (5, 2099)]:
+            self.db.session.add(LnRelease(
+                series_name="Novel",
+                volume=str(volume),
+                volume_number=volume,
+                digital=True,
+                physical=False,
+                release_date_string=f"{year}-01-01",
+                release_date=datetime(year, 1, 1),
+                service=ListService.ANILIST,
+                service_id="4",
+                media_type=MediaType.MANGA
+            ))
+        self.db.session.commit()
+
+    def add_item(
+            self,
+            service_id: str,
+            media_subtype: MediaSubType,
+            latest: int,
+            progress: int,
+            chapter_guess: Optional[int],
+            releasing_state: ReleasingState = ReleasingState.RELEASING,
+            score: Optional[int] = None
+    ):
+        """
+        Adds a media item to the manga list
+        :param service_id: The service ID of the media item
+        :param media_subtype: The media subtype of the media item
+        :param latest: The latest release of the media item
+        :param progress: The user's progress
+        :param chapter_guess: The chapter guess of the media item
+        :param releasing_state: The releasing state of the media item
+        :param score: The user's score. Defaults to the service ID * 10
+        :return: None
+        """
+        if score is None and service_id != "5":
+            score = int(service_id) * 10
+        self.db.session.add(MediaItem(
+            service=ListService.ANILIST,
+            service_id=service_id,
+            media_type=MediaType.MANGA,
+            media_subtype=media_subtype,
+            romaji_title=f"Title {service_id}",
+            cover_url="",
+            latest_release=latest,
+            latest_volume_release=latest,
+            releasing_state=releasing_state
+        ))
+        self.db.session.add(MediaUserState(
+            service=ListService.ANILIST,
+            service_id=service_id,
+            media_type=MediaType.MANGA,
+            user_id=self.user.id,
+            progress=progress,
+            volume_progress=progress,
+            score=score,
+            consuming_state=ConsumingState.CURRENT
+        ))
+        self.db.session.add(MediaListItem(
+            media_list_service=ListService.ANILIST,
+            media_list_media_type=MediaType.MANGA,
+            media_list_user_id=self.user.id,
+            media_list_name="Reading",
+            user_state_service=ListService.ANILIST,
+            user_state_media_type=MediaType.MANGA,
+            user_state_user_id=self.user.id,
+            user_state_service_id=service_id
+        ))
+        if chapter_guess is not None:
+            self.db.session.add(MangaChapterGuess(
+                service=ListService.ANILIST,
+                service_id=service_id,
+                media_type=MediaType.MANGA,
+                guess=chapter_guess
+            ))
+
+    def load(
+            self,
+            media_subtype: Optional[MediaSubType] = None,
+            minimum_diff: int = 0,
+            include_complete: bool = True
+    ) -> list:
+        """
+        Loads the update feed of the manga list
+        :param media_subtype: The media subtype to filter by
+        :param minimum_diff: The minimum amount of unconsumed releases
+        :param include_complete: Whether to include completed entries
+        :return: The service IDs and diffs of the update feed entries
+        """
+        return [
+            (x.user_state_service_id, x.diff)
+            for x in load_update_feed(
+                self.user, "Reading", ListService.ANILIST, MediaType.MANGA,
+                media_subtype, minimum_diff, include_complete
+            )
+        ]
+
+    def test_refreshing_all_entries(self):
+        """
+        Tests that a full refresh generates the same values as the
+        UpdateWrapper class
+        :return: None
+        """
+        self.assertEqual(refresh_update_feed(), 5)
+        self.db.session.commit()
+
+        wrapped = UpdateWrapper.from_db(
+            self.user, "Reading", ListService.ANILIST, MediaType.MANGA,
+            None, 0, True
+        )
+        self.assertEqual(
+            self.load(),
+            [(x.user_state.service_id, x.diff) for x in wrapped]
+        )
+        self.assertEqual(
+            self.load(),
+            [("4", 3), ("3", 0), ("2", 5), ("1", 3), ("5", 39)]
+        )
+
+        entry = load_update_feed(
+            self.user, "Reading", ListService.ANILIST, MediaType.MANGA,
+            None, 0, True
+        )[0]
+        self.assertEqual(entry.title, "Title 4")
+        self.assertEqual(entry.latest, 4)
+        self.assertEqual(entry.progress, 1)
+
+    def test_filtering_entries(self):
+        """
+        Tests filtering the update feed
+        :return: None
+        """
+        refresh_update_feed()
+        self.db.session.commit()
+        self.assertEqual(
+            self.load(minimum_diff=4), [("2", 5), ("5", 39)]
+        )
+        self.assertEqual(
+            self.load(include_complete=False),
+            [("4", 3), ("2", 5), ("1", 3), ("5", 39)]
+        )
+        self.assertEqual(
+            self.load(media_subtype=MediaSubType.NOVEL), [("4", 3)]
+        )
+
+    def test_refreshing_changed_entries(self):
+        """
+        Tests refreshing only the entries of changed media items
+        :return: None
+        """
+        refresh_update_feed()
+        self.db.session.commit()
+
+        MangaChapterGuess.query.filter_by(service_id="1").one().guess = 20
+        MediaUserState.query.filter_by(service_id="2").one().progress = 0
+        self.db.session.commit()
+
+        self.assertEqual(refresh_update_feed([
+            (ListService.ANILIST, "1", MediaType.MANGA)
+        ]), 1)
+        self.db.session.commit()
+        self.assertEqual(dict(self.load())["1"], 15)
+        self.assertEqual(dict(self.load())["2"], 5)
+
+    def test_deleting_list_items(self):
+        """
+        Tests that update feed entries are deleted with their list items
+        :return: None
+        """
+        refresh_update_feed()
+        self.db.session.commit()
+        self.db.session.delete(User.query.get(self.user.id))
+        self.db.session.commit()
+        self.assertEqual(UpdateFeedEntry.query.count(), 0)
+
+    def test_showing_updates(self):
+        """
+        Tests that the updates page displays the update feed
+        :return: None
+        """
+        refresh_update_feed()
+        self.db.session.commit()
+        with self.client:
+            self.login_user(self.user, self.password)
+            resp = self.client.get(
+                "/updates?service=anilist&media_type=manga&list_name=Reading"
+                "&mincount=4&include_complete=0&display_mode=list"
+            )
+        page = resp.data.decode("utf-8")
+        self.assertLess(page.index("Title 2"), page.index("Title 5"))
+        self.assertNotIn("Title 1", page)
+        self.assertNotIn("Title 3", page)
+
+    def test_paginating_entries(self):
+        """
+        Tests that paginating the update feed preserves the score ordering
+        :return: None
+        """
+        refresh_update_feed()
+        self.db.session.commit()
+
+        pages = []
+        cursor = None
+        while True:
+            entries, cursor = load_update_feed_page(
+                self.user, "Reading", ListService.ANILIST, MediaType.MANGA,
+                None, 0, True, cursor, 2
+            )
+            pages.append([x.user_state_service_id for x in entries])
+            if cursor is None:
+                break
+        self.assertEqual(pages, [["4", "3"], ["2", "1"], ["5"]])
+
+        with self.assertRaises(ValueError):
+            load_update_feed_page(
+                self.user, "Reading", ListService.ANILIST, MediaType.MANGA,
+                None, 0, True, "invalid", 2
+            )
+
+    def test_loading_updates_via_api(self):
+        """
+        Tests paging through the update feed using the updates API
+        :return: None
+        """
+        refresh_update_feed()
+        self.db.session.commit()
+        url = "/api/v1/updates?service=anilist&media_type=manga" \
+              "&list_name=Reading&mincount=0&include_complete=1" \
+              "&display_mode=list"
+
+        with self.client:
+            self.login_user(self.user, self.password)
+            with mock.patch.object(Config, "UPDATES_PAGE_SIZE", 3):
+                first = self.client.get(url).get_json()["data"]
+                self.assertIn("Load more", self.client.get(
+                    url.replace("/api/v1", "")
+                ).data.decode("utf-8"))
+                second = self.client.get(first["next_url"]).get_json()["data"]
+
+        self.assertEqual(
+            [x["service_id"] for x in first["updates"]], ["4", "3", "2"]
+        )
+        self.assertEqual(
+            [x["service_id"] for x in second["updates"]], ["1", "5"]
+        )
+        self.assertIsNone(second["next_cursor"])
+        self.assertEqual(second["updates"][1]["diff"], 39)
+        self.assertIn("Title 5", second["html"])
+        self.assertNotIn("Title 4", second["html"])
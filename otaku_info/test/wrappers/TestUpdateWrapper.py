@@ -0,0 +1,194 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+
+from datetime import datetime
+from typing import List
+from sqlalchemy import event
+from jerrycan.db.User import User
+from otaku_info.db import MediaItem, MediaList, MediaListItem, \
+    MediaUserState, MediaIdMapping, MangaChapterGuess, LnRelease
+from otaku_info.enums import ListService, MediaType, MediaSubType, \
+    ReleasingState, ConsumingState
+from otaku_info.wrappers.UpdateWrapper import UpdateWrapper
+from otaku_info.test.TestFramework import _TestFramework
+
+
+class TestUpdateWrapper(_TestFramework):
+    """
+    Class that tests the UpdateWrapper class
+    """
+
+    def setUp(self):
+        """
+        Creates a manga list for a sample user
+        :return: None
+        """
+        super().setUp()
+        user, _, _ = self.generate_sample_user()
+        self.user_id = user.id
+        self.db.session.add(MediaList(
+            service=ListService.ANILIST,
+            media_type=MediaType.MANGA,
+            user_id=self.user_id,
+            name="Reading"
+        ))
+        self.db.session.commit()
+        self.statements: List[str] = []
+
+    def add_items(self, start: int, end: int):
+        """
+        Adds manga and light novels including their chapter guesses,
+        ID mappings and light novel releases to the manga list
+        :param start: The first service ID to add
+        :param end: The service ID after the last service ID to add
+        :return: None
+        """
+        for i in range(start, end):
+            service_id = str(i)
+            novel = i % 2 == 0
+            self.db.session.add(MediaItem(
+                service=ListService.ANILIST,
+                service_id=service_id,
+                media_type=MediaType.MANGA,
+                media_subtype=MediaSubType.NOVEL if novel
+                else MediaSubType.MANGA,
+                romaji_title=f"Title {i}",
+                cover_url="",
+                latest_release=100,
+                latest_volume_release=2,
+                releasing_state=ReleasingState.RELEASING
+            ))
+            self.db.session.add(MediaUserState(
+                service=ListService.ANILIST,
+                service_id=service_id,
+                media_type=MediaType.MANGA,
+                user_id=self.user_id,
+                progress=i,
+                volume_progress=1,
+                score=i,
+                consuming_state=ConsumingState.CURRENT
+            ))
+            self.db.session.add(MediaListItem(
+                media_list_service=ListService.ANILIST,
+                media_list_media_type=MediaType.MANGA,
+                media_list_user_id=self.user_id,
+                media_list_name="Reading",
+                user_state_service=ListService.ANILIST,
+                user_state_media_type=MediaType.MANGA,
+                user_state_user_id=self.user_id,
+                user_state_service_id=service_id
+            ))
+            self.db.session.add(MediaIdMapping(
+                parent_service=ListService.ANILIST,
+                parent_service_id=service_id,
+                media_type=MediaType.MANGA,
+                service=ListService.MYANIMELIST,
+                service_id=service_id
+            ))
+            if novel:
+                self.db.session.add(LnRelease(
+                    series_name=f"Title {i}",
+                    volume="5",
+                    volume_number=5,
+                    digital=True,
+                    physical=False,
+                    release_date_string="2020-01-01",
+                    release_date=datetime(2020, 1, 1),
+                    service=ListService.ANILIST,
+                    service_id=service_id,
+                    media_type=MediaType.MANGA
+                ))
+            else:
+                self.db.session.add(MangaChapterGuess(
+                    service=ListService.ANILIST,
+                    service_id=service_id,
+                    media_type=MediaType.MANGA,
+                    guess=200
+                ))
+        self.db.session.commit()
+        self.db.session.expunge_all()
+
+    def load_updates(self) -> List[UpdateWrapper]:
+        """
+        Loads the updates of the manga list while recording the executed
+        SQL statements. Accessing the wrapped data must not emit any
+        further statements.
+        :return: The updates
+        """
+        def record(_conn, _cursor, statement, *_):
+            self.statements.append(statement)
+
+        self.statements = []
+        user = User.query.get(self.user_id)
+        event.listen(self.db.engine, "before_cursor_execute", record)
+        try:
+            updates = UpdateWrapper.from_db(
+                user, "Reading", ListService.ANILIST, MediaType.MANGA,
+                None, 0, True
+            )
+            for update in updates:
+                _ = [update.title, update.url, update.related_ids]
+        finally:
+            event.remove(self.db.engine, "before_cursor_execute", record)
+        return updates
+
+    def test_statement_count(self):
+        """
+        Tests that the updates are loaded using one query for the list and
+        its many-to-one relations and one query per collection, regardless
+        of the size of the list
+        :return: None
+        """
+        self.add_items(0, 10)
+        updates = self.load_updates()
+        self.assertEqual(len(updates), 10)
+        self.assertEqual(len(self.statements), 3)
+        self.assertEqual(
+            len([x for x in self.statements if "id_mappings" in x]), 1
+        )
+        self.assertEqual(
+            len([x for x in self.statements if "ln_releases" in x]), 1
+        )
+
+        self.add_items(10, 100)
+        updates = self.load_updates()
+        self.assertEqual(len(updates), 100)
+        self.assertEqual(len(self.statements), 3)
+
+    def test_loaded_values(self):
+        """
+        Tests that the eagerly loaded relations are used to calculate the
+        update values
+        :return: None
+        """
+        self.add_items(0, 4)
+        updates = {
+            x.user_state.service_id: x for x in self.load_updates()
+        }
+        self.assertEqual(
+            [updates[str(i)].latest for i in range(4)], [5, 200, 5, 200]
+        )
+        self.assertEqual(
+            [updates[str(i)].diff for i in range(4)], [4, 199, 4, 197]
+        )
+        self.assertEqual(
+            [x.service for x in updates["0"].related_ids],
+            [ListService.ANILIST, ListService.MYANIMELIST]
+        )
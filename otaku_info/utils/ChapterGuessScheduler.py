@@ -0,0 +1,118 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import math
+import time
+import heapq
+from typing import Optional, List, Tuple
+from otaku_info.db.MangaChapterGuess import MangaChapterGuess
+from otaku_info.db.MangaChapterGuessHistory import MangaChapterGuessHistory
+from otaku_info.enums import ReleasingState
+
+
+class ChapterGuessScheduler:
+    """
+    Priority queue that decides which manga chapter guesses are updated
+    first. Guesses that are most likely to have changed are preferred:
+    Releasing manga with many current readers, whose guess was updated a
+    long time ago and which historically changed often and recently.
+    """
+
+    WEEK = 60 * 60 * 24 * 7
+    """
+    The length of a week in seconds
+    """
+
+    def __init__(self, min_interval: int = 60 * 60, now: Optional[int] = None):
+        """
+        Initializes the scheduler
+        :param min_interval: The minimum amount of seconds between two
+                             updates of the same guess
+        :param now: The current time. Defaults to the current system time.
+        """
+        self.min_interval = min_interval
+        self.now = int(time.time()) if now is None else now
+        self.queue: List[Tuple[float, int, MangaChapterGuess]] = []
+
+    def push(
+            self,
+            guess: MangaChapterGuess,
+            releasing_state: ReleasingState,
+            current_readers: int,
+            history: Optional[MangaChapterGuessHistory]
+    ):
+        """
+        Adds a chapter guess to the queue.
+        Guesses that were updated too recently are ignored.
+        :param guess: The chapter guess
+        :param releasing_state: The releasing state of the manga
+        :param current_readers: The amount of users currently reading
+                                the manga
+        :param history: The change history of the chapter guess
+        :return: None
+        """
+        if self.now - guess.last_update <= self.min_interval:
+            return
+        priority = self.calculate_priority(
+            guess.last_update, releasing_state, current_readers, history
+        )
+        heapq.heappush(self.queue, (-priority, len(self.queue), guess))
+
+    def pop(self, count: int) -> List[MangaChapterGuess]:
+        """
+        Removes the guesses with the highest priority from the queue
+        :param count: The maximum amount of guesses to remove
+        :return: The guesses, ordered by priority
+        """
+        guesses: List[MangaChapterGuess] = []
+        while len(self.queue) > 0 and len(guesses) < count:
+            guesses.append(heapq.heappop(self.queue)[2])
+        return guesses
+
+    def calculate_priority(
+            self,
+            last_update: int,
+            releasing_state: ReleasingState,
+            current_readers: int,
+            history: Optional[MangaChapterGuessHistory]
+    ) -> float:
+        """
+        Calculates the update priority of a chapter guess
+        :param last_update: The time the guess was last updated
+        :param releasing_state: The releasing state of the manga
+        :param current_readers: The amount of users currently reading
+                                the manga
+        :param history: The change history of the chapter guess
+        :return: The priority. Higher values are updated first.
+        """
+        hours_stale = max(0, self.now - last_update) / (60 * 60)
+        releasing = 1.0 if releasing_state == ReleasingState.RELEASING \
+            else 0.1
+        readers = 1 + math.log1p(current_readers)
+
+        changes_per_week = 0.0
+        recency = 1.0
+        if history is not None and history.first_update > 0:
+            tracked = max(self.now - history.first_update, self.WEEK)
+            changes_per_week = history.change_count * self.WEEK / tracked
+            last_change = max(history.last_change, history.first_update)
+            recency = 1 / (1 + max(0, self.now - last_change) / self.WEEK)
+
+        return hours_stale * releasing * readers \
+            * (1 + changes_per_week) * recency
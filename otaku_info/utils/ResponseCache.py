@@ -0,0 +1,219 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import json
+import time
+import sqlite3
+from threading import Lock
+from typing import Optional, Dict, Any, List
+from otaku_info.Config import Config
+from otaku_info.utils.db import MAX_BOUND_PARAMETERS
+
+
+class ResponseCache:
+    """
+    Persistent, thread-safe cache for responses of external APIs.
+    The entries are stored in a SQLite database and grouped into namespaces,
+    for example one per service. Every entry expires after the TTL it was
+    stored with. If the cache grows larger than its maximum size, the least
+    recently used entries are evicted.
+    Hits and misses are counted per namespace.
+    """
+
+    def __init__(
+            self,
+            path: Optional[str] = None,
+            max_size: Optional[int] = None
+    ):
+        """
+        Initializes the cache. The database is opened on first use.
+        :param path: The path to the SQLite database file.
+                     Defaults to Config.RESPONSE_CACHE_PATH
+        :param max_size: The maximum amount of entries. If this is 0 or less,
+                         the cache is disabled.
+                         Defaults to Config.RESPONSE_CACHE_SIZE
+        """
+        self.path = path
+        self._max_size = max_size
+        self.lock = Lock()
+        self.connection: Optional[sqlite3.Connection] = None
+        self.counters: Dict[str, Dict[str, int]] = {}
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """
+        Retrieves an entry from the cache
+        :param namespace: The namespace of the entry
+        :param key: The key of the entry
+        :return: The cached value, or None if no valid entry exists
+        """
+        return self.get_many(namespace, [key]).get(key)
+
+    def get_many(self, namespace: str, keys: List[str]) -> Dict[str, Any]:
+        """
+        Retrieves multiple entries from the cache
+        :param namespace: The namespace of the entries
+        :param keys: The keys of the entries
+        :return: The cached values of the keys that have valid entries
+        """
+        if self.max_size <= 0 or len(keys) == 0:
+            return {}
+
+        now = time.time()
+        values: Dict[str, Any] = {}
+        with self.lock:
+            connection = self.__connect()
+            for i in range(0, len(keys), MAX_BOUND_PARAMETERS):
+                chunk = keys[i:i + MAX_BOUND_PARAMETERS]
+                placeholders = ",".join(["?"] * len(chunk))
+                rows = connection.execute(
+                    f"SELECT key, value FROM responses "
+                    f"WHERE namespace = ? AND expires > ? "
+                    f"AND key IN ({placeholders})",
+                    [namespace, now] + chunk
+                ).fetchall()
+                for key, value in rows:
+                    values[key] = json.loads(value)
+                connection.executemany(
+                    "UPDATE responses SET accessed = ? "
+                    "WHERE namespace = ? AND key = ?",
+                    [(now, namespace, key) for key, _ in rows]
+                )
+
+            counters = self.counters.setdefault(
+                namespace, {"hits": 0, "misses": 0}
+            )
+            counters["hits"] += len(values)
+            counters["misses"] += len(set(keys)) - len(values)
+        return values
+
+    def set(self, namespace: str, key: str, value: Any, ttl: int):
+        """
+        Stores an entry in the cache
+        :param namespace: The namespace of the entry
+        :param key: The key of the entry
+        :param value: The value to store. Must be JSON serializable.
+        :param ttl: The amount of seconds the entry stays valid
+        :return: None
+        """
+        self.set_many(namespace, {key: value}, ttl)
+
+    def set_many(self, namespace: str, values: Dict[str, Any], ttl: int):
+        """
+        Stores multiple entries in the cache and evicts the least recently
+        used entries if the cache grew too large
+        :param namespace: The namespace of the entries
+        :param values: The values to store, mapped to their keys.
+                       Must be JSON serializable.
+        :param ttl: The amount of seconds the entries stay valid
+        :return: None
+        """
+        max_size = self.max_size
+        if max_size <= 0 or len(values) == 0:
+            return
+
+        now = time.time()
+        with self.lock:
+            connection = self.__connect()
+            connection.executemany(
+                "INSERT OR REPLACE INTO responses "
+                "(namespace, key, value, expires, accessed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (namespace, key, json.dumps(value), now + ttl, now)
+                    for key, value in values.items()
+                ]
+            )
+            size = connection.execute(
+                "SELECT COUNT(*) FROM responses"
+            ).fetchone()[0]
+            if size > max_size:
+                connection.execute(
+                    "DELETE FROM responses WHERE rowid IN ("
+                    "SELECT rowid FROM responses "
+                    "ORDER BY expires <= ? DESC, accessed ASC LIMIT ?)",
+                    (now, size - max_size)
+                )
+
+    @property
+    def max_size(self) -> int:
+        """
+        :return: The maximum amount of entries in the cache
+        """
+        if self._max_size is None:
+            return Config.RESPONSE_CACHE_SIZE
+        return self._max_size
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Retrieves the hit and miss counters of the cache
+        :return: The amount of hits and misses, grouped by namespace
+        """
+        with self.lock:
+            return {
+                namespace: dict(counters)
+                for namespace, counters in self.counters.items()
+            }
+
+    def clear(self):
+        """
+        Removes all entries from the cache and resets the counters
+        :return: None
+        """
+        with self.lock:
+            self.__connect().execute("DELETE FROM responses")
+            self.counters = {}
+
+    def close(self):
+        """
+        Closes the cache database. It is reopened on the next use.
+        :return: None
+        """
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+    def __connect(self) -> sqlite3.Connection:
+        """
+        Opens the cache database if it isn't opened yet.
+        Must be called while holding the lock.
+        :return: The database connection
+        """
+        if self.connection is None:
+            path = Config.RESPONSE_CACHE_PATH \
+                if self.path is None else self.path
+            connection = sqlite3.connect(
+                path, check_same_thread=False, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "namespace TEXT NOT NULL, "
+                "key TEXT NOT NULL, "
+                "value TEXT NOT NULL, "
+                "expires REAL NOT NULL, "
+                "accessed REAL NOT NULL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed "
+                "ON responses (accessed)"
+            )
+            self.connection = connection
+        return self.connection
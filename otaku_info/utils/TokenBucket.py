@@ -0,0 +1,108 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+from threading import Lock
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket that limits the rate of requests to an API.
+    The bucket holds up to `capacity` tokens and is refilled with `rate`
+    tokens per second. Every request consumes one token.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        """
+        Initializes the token bucket. The bucket starts out full.
+        :param rate: The amount of tokens that are added per second
+        :param capacity: The maximum amount of tokens in the bucket
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.last_refill = time.monotonic()
+        self.lock = Lock()
+
+    def acquire(self, tokens: int = 1):
+        """
+        Takes tokens from the bucket, blocking until enough are available
+        :param tokens: The amount of tokens to take
+        :return: None
+        """
+        while True:
+            with self.lock:
+                self._refill()
+                now = time.monotonic()
+                if self.tokens >= tokens and now >= self.last_refill:
+                    self.tokens -= tokens
+                    return
+                wait = max(0.0, self.last_refill - now) \
+                    + max(0.0, tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def set_rate(self, rate: float):
+        """
+        Changes the rate at which the bucket is refilled
+        :param rate: The amount of tokens that are added per second
+        :return: None
+        """
+        with self.lock:
+            self._refill()
+            self.rate = rate
+
+    def synchronize(self, remaining: int):
+        """
+        Synchronizes the bucket with the amount of remaining requests
+        reported by the API. The bucket never holds more tokens than the
+        API still allows.
+        :param remaining: The amount of remaining requests
+        :return: None
+        """
+        with self.lock:
+            self._refill()
+            self.tokens = max(0.0, min(self.tokens, float(remaining)))
+
+    def pause(self, seconds: float):
+        """
+        Empties the bucket and stops refilling it for a while.
+        Used when the API reports that the rate limit was exceeded.
+        :param seconds: The amount of seconds to pause
+        :return: None
+        """
+        with self.lock:
+            self.tokens = 0.0
+            self.last_refill = max(
+                self.last_refill, time.monotonic() + seconds
+            )
+
+    def _refill(self):
+        """
+        Adds the tokens that accumulated since the last refill.
+        Must be called while holding the lock.
+        :return: None
+        """
+        now = time.monotonic()
+        if now < self.last_refill:  # Paused
+            return
+        self.tokens = min(
+            float(self.capacity),
+            self.tokens + (now - self.last_refill) * self.rate
+        )
+        self.last_refill = now
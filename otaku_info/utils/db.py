@@ -0,0 +1,155 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from typing import List, Dict, Any, Tuple, Type, FrozenSet
+from sqlalchemy import and_, or_
+from sqlalchemy.inspection import inspect
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from jerrycan.base import db
+
+MAX_BOUND_PARAMETERS = 900
+"""
+The maximum amount of bound parameters used in a single statement.
+Stays below SQLite's limit of 999 bound parameters per statement.
+"""
+
+
+def upsert_entries(
+        model: Type[db.Model],
+        entries: List[db.Model],
+        batch_size: int = 1000
+):
+    """
+    Inserts or updates database entries in bulk.
+    Entries are identified using the primary key of the model. If the same
+    primary key occurs more than once, the last entry wins.
+    On PostgreSQL, this uses INSERT ... ON CONFLICT DO UPDATE statements.
+    Other databases (like SQLite) fall back to batched lookups of the
+    existing primary keys followed by bulk inserts and bulk updates.
+    Only the columns that were explicitly set on the entries are written,
+    so column defaults still apply to newly inserted rows.
+    The session is not committed.
+    :param model: The database model of the entries
+    :param entries: The entries to upsert
+    :param batch_size: The maximum amount of rows per statement
+    :return: None
+    """
+    primary_keys = [column.key for column in inspect(model).primary_key]
+    rows: Dict[Tuple, Dict[str, Any]] = {}
+    for entry in entries:
+        row = __entry_to_row(model, entry)
+        rows[tuple(row[key] for key in primary_keys)] = row
+
+    if len(rows) == 0:
+        return
+
+    groups: Dict[FrozenSet[str], List[Dict[str, Any]]] = {}
+    for row in rows.values():
+        groups.setdefault(frozenset(row.keys()), []).append(row)
+
+    for group in groups.values():
+        if db.engine.dialect.name == "postgresql":
+            __upsert_postgresql(model, group, primary_keys, batch_size)
+        else:
+            __upsert_generic(model, group, primary_keys)
+
+
+def __entry_to_row(model: Type[db.Model], entry: db.Model) -> Dict[str, Any]:
+    """
+    Converts a model object into a dictionary of its set column values
+    :param model: The database model of the entry
+    :param entry: The entry to convert
+    :return: The column values, keyed by attribute name
+    """
+    return {
+        attribute.key: getattr(entry, attribute.key)
+        for attribute in inspect(model).column_attrs
+        if attribute.key in entry.__dict__
+    }
+
+
+def __upsert_postgresql(
+        model: Type[db.Model],
+        rows: List[Dict[str, Any]],
+        primary_keys: List[str],
+        batch_size: int
+):
+    """
+    Upserts rows using PostgreSQL's INSERT ... ON CONFLICT DO UPDATE
+    :param model: The database model of the rows
+    :param rows: The rows to upsert. All rows must have the same keys.
+    :param primary_keys: The primary key attributes of the model
+    :param batch_size: The maximum amount of rows per statement
+    :return: None
+    """
+    for i in range(0, len(rows), batch_size):
+        stmt = postgresql_insert(model.__table__)\
+            .values(rows[i:i + batch_size])
+        updates = {
+            key: stmt.excluded[key]
+            for key in rows[0].keys()
+            if key not in primary_keys
+        }
+        if len(updates) == 0:
+            stmt = stmt.on_conflict_do_nothing(index_elements=primary_keys)
+        else:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=primary_keys, set_=updates
+            )
+        db.session.execute(stmt)
+
+
+def __upsert_generic(
+        model: Type[db.Model],
+        rows: List[Dict[str, Any]],
+        primary_keys: List[str]
+):
+    """
+    Upserts rows by looking up which primary keys already exist in batches
+    and then bulk inserting and bulk updating the rows accordingly
+    :param model: The database model of the rows
+    :param rows: The rows to upsert. All rows must have the same keys.
+    :param primary_keys: The primary key attributes of the model
+    :return: None
+    """
+    columns = [getattr(model, key) for key in primary_keys]
+    lookup_size = max(1, MAX_BOUND_PARAMETERS // len(primary_keys))
+
+    existing = set()
+    for i in range(0, len(rows), lookup_size):
+        conditions = [
+            and_(*[column == row[column.key] for column in columns])
+            for row in rows[i:i + lookup_size]
+        ]
+        existing.update(
+            db.session.query(*columns).filter(or_(*conditions)).all()
+        )
+
+    new_rows = []
+    existing_rows = []
+    for row in rows:
+        if tuple(row[key] for key in primary_keys) in existing:
+            existing_rows.append(row)
+        else:
+            new_rows.append(row)
+
+    if len(new_rows) > 0:
+        db.session.bulk_insert_mappings(model, new_rows)
+    if len(existing_rows) > 0 and len(rows[0]) > len(primary_keys):
+        db.session.bulk_update_mappings(model, existing_rows)
@@ -0,0 +1,53 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+
+from typing import List, Optional
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:  # pragma: no cover
+    HTML_PARSER = "html.parser"
+"""
+The parser used by BeautifulSoup. Uses lxml if it is installed, since it is
+considerably faster than python's builtin html.parser.
+"""
+
+
+def parse_html(
+        body: str,
+        tags: Optional[List[str]] = None,
+        parser: Optional[str] = None
+) -> BeautifulSoup:
+    """
+    Parses an HTML document
+    :param body: The HTML document
+    :param tags: If provided, only these tags (and their contents) are
+                 added to the parse tree. Everything else is skipped.
+    :param parser: The parser to use. Defaults to HTML_PARSER
+    :return: The parsed document
+    """
+    strainer = None if tags is None else SoupStrainer(tags)
+    return BeautifulSoup(
+        body,
+        HTML_PARSER if parser is None else parser,
+        parse_only=strainer
+    )
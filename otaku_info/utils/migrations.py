@@ -0,0 +1,160 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+
+from typing import List, Type
+from sqlalchemy import or_
+from sqlalchemy.inspection import inspect
+from jerrycan.base import app, db
+from otaku_info.db.LnRelease import LnRelease
+from otaku_info.db.MediaListItem import MediaListItem
+from otaku_info.db.SyncWatermark import SyncWatermark
+from otaku_info.db.UpdateFeedEntry import UpdateFeedEntry
+from otaku_info.utils.update_feed import refresh_update_feed
+
+
+def migrate_database():
+    """
+    Applies schema changes to existing tables.
+    db.create_all only creates missing tables, so columns and indexes that
+    were added to existing models are added here. Every migration checks
+    whether it was already applied, so this can be run on every startup.
+    :return: None
+    """
+    added = __add_missing_columns(
+        LnRelease, ["release_date", "volume_number"]
+    )
+    __backfill_ln_releases()
+    __apply_not_null_constraints(LnRelease, added)
+    __add_missing_columns(SyncWatermark, ["last_full_sync"])
+    __populate_update_feed()
+
+
+def __add_missing_columns(
+        model: Type[db.Model],
+        column_names: List[str]
+) -> List[str]:
+    """
+    Adds columns and indexes of a model that don't exist in its table yet.
+    The columns are added as nullable columns, since existing rows don't
+    have values yet.
+    :param model: The database model
+    :param column_names: The names of the columns to add if missing
+    :return: The names of the added columns
+    """
+    table = model.__table__
+    inspector = inspect(db.engine)
+    existing = {x["name"] for x in inspector.get_columns(table.name)}
+
+    added = [x for x in column_names if x not in existing]
+    for name in added:
+        column_type = table.c[name].type.compile(dialect=db.engine.dialect)
+        app.logger.info(f"Adding column {table.name}.{name}")
+        db.session.execute(
+            f"ALTER TABLE {table.name} ADD COLUMN {name} {column_type}"
+        )
+    db.session.commit()
+
+    existing_indexes = {x["name"] for x in inspector.get_indexes(table.name)}
+    for index in table.indexes:
+        if index.name not in existing_indexes:
+            app.logger.info(f"Creating index {index.name}")
+            index.create(db.engine)
+
+    return added
+
+
+def __apply_not_null_constraints(
+        model: Type[db.Model],
+        column_names: List[str]
+):
+    """
+    Applies the NOT NULL constraints of columns that were added to an
+    existing table, once the existing rows were backfilled.
+    SQLite does not support altering columns, so this is only done
+    on PostgreSQL.
+    :param model: The database model
+    :param column_names: The names of the added columns
+    :return: None
+    """
+    if db.engine.dialect.name != "postgresql":
+        return
+
+    table = model.__table__
+    for name in column_names:
+        if not table.c[name].nullable:
+            db.session.execute(
+                f"ALTER TABLE {table.name} ALTER COLUMN {name} SET NOT NULL"
+            )
+    db.session.commit()
+
+
+def __backfill_ln_releases(batch_size: int = 1000):
+    """
+    Fills in the parsed release dates and volume numbers of LN releases
+    that were stored before those columns existed
+    :param batch_size: The amount of rows updated per transaction
+    :return: None
+    """
+    primary_keys = [column.key for column in inspect(LnRelease).primary_key]
+    columns = [getattr(LnRelease, key) for key in primary_keys]
+    missing = or_(
+        LnRelease.release_date.is_(None),
+        LnRelease.volume_number.is_(None)
+    )
+
+    backfilled = 0
+    while True:
+        rows = db.session.query(
+            *columns, LnRelease.release_date_string, LnRelease.volume
+        ).filter(missing).limit(batch_size).all()
+        if len(rows) == 0:
+            break
+
+        db.session.bulk_update_mappings(LnRelease, [
+            dict(
+                zip(primary_keys, row[:len(primary_keys)]),
+                release_date=LnRelease.parse_release_date(
+                    row.release_date_string
+                ),
+                volume_number=LnRelease.parse_volume_number(row.volume)
+            )
+            for row in rows
+        ])
+        db.session.commit()
+        backfilled += len(rows)
+
+    if backfilled > 0:
+        app.logger.info(f"Backfilled {backfilled} LN releases")
+
+
+def __populate_update_feed():
+    """
+    Fills the update feed if it is empty while media list items exist,
+    for example after the update feed table was created.
+    Afterwards, the background tasks keep the update feed up to date.
+    :return: None
+    """
+    if UpdateFeedEntry.query.first() is not None \
+            or MediaListItem.query.first() is None:
+        return
+
+    refreshed = refresh_update_feed()
+    db.session.commit()
+    app.logger.info(f"Populated the update feed with {refreshed} entries")
@@ -105,6 +105,8 @@ def reddit_ln_release_to_ln_release(
         physical=reddit_item.physical,
         digital=reddit_item.digital,
         release_date_string=reddit_item.release_date_string,
+        release_date=reddit_item.release_date,
+        volume_number=LnRelease.parse_volume_number(reddit_item.volume),
         publisher=reddit_item.publisher,
         purchase_link=reddit_item.purchase_link
     )
@@ -0,0 +1,253 @@
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+
+import json
+import base64
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import joinedload
+from jerrycan.base import db
+from jerrycan.db.User import User
+from otaku_info.db.MediaItem import MediaItem
+from otaku_info.db.MediaListItem import MediaListItem
+from otaku_info.db.MediaUserState import MediaUserState
+from otaku_info.db.UpdateFeedEntry import UpdateFeedEntry
+from otaku_info.enums import ListService, MediaType, MediaSubType, \
+    ReleasingState
+from otaku_info.utils.db import upsert_entries, MAX_BOUND_PARAMETERS
+from otaku_info.wrappers.UpdateWrapper import UpdateWrapper
+
+
+def load_update_feed(
+        user: User,
+        list_name: str,
+        service: ListService,
+        media_type: MediaType,
+        media_subtype: Optional[MediaSubType],
+        minimum_diff: int,
+        include_complete: bool,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None
+) -> List[UpdateFeedEntry]:
+    """
+    Loads the update feed entries of a media list, filtered and sorted by
+    the database. The entries are ordered by score, highest first.
+    Only the media items and ID mappings of the returned entries are loaded.
+    :param user: The user for whom to load the updates
+    :param list_name: The list name for which to load the updates
+    :param service: The service for which to load the updates
+    :param media_type: The media type for which to load the updates
+    :param media_subtype: If specified, limits the results to a specific
+                          media subtype (example: Light novels)
+    :param minimum_diff: Specifies a minimum diff value
+    :param include_complete: Specifies whether completed items should be
+                             included
+    :param cursor: If specified, only entries after the entry this cursor
+                   was generated for are loaded
+    :param limit: The maximum amount of entries to load
+    :return: The update feed entries
+    :raises ValueError: If the cursor is invalid
+    """
+    query = UpdateFeedEntry.query.filter(
+        UpdateFeedEntry.media_list_user_id == user.id,
+        UpdateFeedEntry.media_list_service == service,
+        UpdateFeedEntry.media_list_media_type == media_type,
+        UpdateFeedEntry.media_list_name == list_name,
+        UpdateFeedEntry.diff >= minimum_diff
+    )
+    if media_subtype is not None:
+        query = query.filter(UpdateFeedEntry.media_subtype == media_subtype)
+    if not include_complete:
+        query = query.filter(
+            UpdateFeedEntry.releasing_state != ReleasingState.FINISHED
+        )
+    if cursor is not None:
+        query = query.filter(__decode_cursor(cursor))
+
+    query = query.order_by(
+        UpdateFeedEntry.score.desc().nullslast(),
+        UpdateFeedEntry.user_state_service_id
+    ).options(
+        joinedload(UpdateFeedEntry.media_item)
+        .subqueryload(MediaItem.id_mappings)
+    )
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+
+def load_update_feed_page(
+        user: User,
+        list_name: str,
+        service: ListService,
+        media_type: MediaType,
+        media_subtype: Optional[MediaSubType],
+        minimum_diff: int,
+        include_complete: bool,
+        cursor: Optional[str],
+        page_size: int
+) -> Tuple[List[UpdateFeedEntry], Optional[str]]:
+    """
+    Loads a page of update feed entries of a media list.
+    See load_update_feed for more information on the parameters.
+    :param user: The user for whom to load the updates
+    :param list_name: The list name for which to load the updates
+    :param service: The service for which to load the updates
+    :param media_type: The media type for which to load the updates
+    :param media_subtype: If specified, limits the results to a specific
+                          media subtype
+    :param minimum_diff: Specifies a minimum diff value
+    :param include_complete: Specifies whether completed items should be
+                             included
+    :param cursor: The cursor of the page. The first page is loaded if
+                   this is None
+    :param page_size: The maximum amount of entries on the page
+    :return: The entries of the page and the cursor of the next page,
+             which is None if this is the last page
+    :raises ValueError: If the cursor is invalid
+    """
+    entries = load_update_feed(
+        user, list_name, service, media_type, media_subtype, minimum_diff,
+        include_complete, cursor, page_size + 1
+    )
+    if len(entries) <= page_size:
+        return entries, None
+    entries = entries[:page_size]
+    return entries, __encode_cursor(entries[-1])
+
+
+def __encode_cursor(entry: UpdateFeedEntry) -> str:
+    """
+    Generates a cursor that points to the position after an update feed
+    entry in the update feed's sort order
+    :param entry: The update feed entry
+    :return: The cursor
+    """
+    data = json.dumps([entry.score, entry.user_state_service_id])
+    return base64.urlsafe_b64encode(data.encode("utf-8")).decode("utf-8")
+
+
+def __decode_cursor(cursor: str):
+    """
+    Generates a filter condition that matches all update feed entries that
+    come after the position of a cursor in the update feed's sort order
+    :param cursor: The cursor
+    :return: The filter condition
+    :raises ValueError: If the cursor is invalid
+    """
+    try:
+        score, service_id = json.loads(
+            base64.urlsafe_b64decode(cursor.encode("utf-8"))
+        )
+        if score is not None:
+            score = int(score)
+        service_id = str(service_id)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+    if score is None:
+        return and_(
+            UpdateFeedEntry.score.is_(None),
+            UpdateFeedEntry.user_state_service_id > service_id
+        )
+    else:
+        return or_(
+            UpdateFeedEntry.score < score,
+            and_(
+                UpdateFeedEntry.score == score,
+                UpdateFeedEntry.user_state_service_id > service_id
+            ),
+            UpdateFeedEntry.score.is_(None)
+        )
+
+
+def refresh_update_feed(
+        media_item_keys: Optional[
+            Iterable[Tuple[ListService, str, MediaType]]
+        ] = None
+) -> int:
+    """
+    Recomputes the update feed entries of all media list items that
+    reference specific media items.
+    The list items are loaded in batches using batched IN queries,
+    their relations are loaded using UpdateWrapper.loader_options.
+    The session is not committed.
+    :param media_item_keys: The (service, service ID, media type) keys of
+                            the media items whose entries should be
+                            refreshed. If not provided, all entries are
+                            refreshed.
+    :return: The amount of refreshed entries
+    """
+    if media_item_keys is None:
+        media_item_keys = db.session.query(
+            MediaUserState.service,
+            MediaUserState.service_id,
+            MediaUserState.media_type
+        ).distinct().all()
+
+    grouped: Dict[Tuple[ListService, MediaType], Set[str]] = {}
+    for service, service_id, media_type in media_item_keys:
+        grouped.setdefault((service, media_type), set()).add(service_id)
+
+    refreshed = 0
+    for (service, media_type), service_ids in grouped.items():
+        sorted_ids = sorted(service_ids)
+        for i in range(0, len(sorted_ids), MAX_BOUND_PARAMETERS):
+            list_items: List[MediaListItem] = MediaListItem.query.filter(
+                MediaListItem.user_state_service == service,
+                MediaListItem.user_state_media_type == media_type,
+                MediaListItem.user_state_service_id.in_(
+                    sorted_ids[i:i + MAX_BOUND_PARAMETERS]
+                )
+            ).options(*UpdateWrapper.loader_options()).all()
+            upsert_entries(
+                UpdateFeedEntry,
+                [generate_update_feed_entry(x) for x in list_items]
+            )
+            refreshed += len(list_items)
+
+    return refreshed
+
+
+def generate_update_feed_entry(list_item: MediaListItem) -> UpdateFeedEntry:
+    """
+    Generates the update feed entry of a media list item
+    :param list_item: The media list item, with its user state, media item,
+                      chapter guess, ID mappings and LN releases loaded
+    :return: The update feed entry
+    """
+    update = UpdateWrapper(list_item.user_state)
+    media_item = list_item.user_state.media_item
+    return UpdateFeedEntry(
+        media_list_service=list_item.media_list_service,
+        media_list_media_type=list_item.media_list_media_type,
+        media_list_user_id=list_item.media_list_user_id,
+        media_list_name=list_item.media_list_name,
+        user_state_service=list_item.user_state_service,
+        user_state_service_id=list_item.user_state_service_id,
+        user_state_media_type=list_item.user_state_media_type,
+        user_state_user_id=list_item.user_state_user_id,
+        media_subtype=media_item.media_subtype,
+        releasing_state=media_item.releasing_state,
+        score=update.score,
+        progress=update.progress,
+        latest=update.latest,
+        diff=update.diff
+    )
@@ -19,7 +19,8 @@ LICENSE"""
 
 from datetime import datetime
 from typing import List, Optional
-from jerrycan.base import db
+from sqlalchemy.orm import Query, joinedload
+from sqlalchemy.orm.strategy_options import Load
 from jerrycan.db.User import User
 from otaku_info.enums import MediaType, MediaSubType, ListService, \
     ReleasingState
@@ -176,33 +177,59 @@ class UpdateWrapper:
                                  included
         :return: A list of UpdateWrapper objects
         """
-        media_lists: List[MediaList] = MediaList.query \
-            .filter_by(
-                user=user,
-                name=list_name,
-                service=service,
-                media_type=media_type
-            ) \
-            .options(
-                db.joinedload(MediaList.list_items)
-                  .subqueryload(MediaListItem.user_state)
-                  .subqueryload(MediaUserState.media_item)
-                  .subqueryload(MediaItem.chapter_guess)
-            ) \
-            .options(
-                db.joinedload(MediaList.list_items)
-                  .subqueryload(MediaListItem.user_state)
-                  .subqueryload(MediaUserState.media_item)
-                  .subqueryload(MediaItem.id_mappings)
-            ) \
-            .options(
-                db.joinedload(MediaList.list_items)
-                  .subqueryload(MediaListItem.user_state)
-                  .subqueryload(MediaUserState.media_item)
-                  .subqueryload(MediaItem.ln_releases)
-            ) \
-            .all()
-
+        media_lists: List[MediaList] = \
+            cls.build_query(user, list_name, service, media_type).all()
         return cls.from_media_lists(
             media_lists, media_subtype, minimum_diff, include_complete
         )
+
+    @classmethod
+    def build_query(
+            cls,
+            user: User,
+            list_name: str,
+            service: ListService,
+            media_type: MediaType
+    ) -> Query:
+        """
+        Builds a query for media lists that eagerly loads everything
+        required to generate UpdateWrapper objects for their items
+        :param user: The user for whom to load the media lists
+        :param list_name: The name of the media lists
+        :param service: The service of the media lists
+        :param media_type: The media type of the media lists
+        :return: The query
+        """
+        return MediaList.query.filter_by(
+            user=user,
+            name=list_name,
+            service=service,
+            media_type=media_type
+        ).options(*cls.loader_options(joinedload(MediaList.list_items)))
+
+    @staticmethod
+    def loader_options(list_items: Optional[Load] = None) -> List[Load]:
+        """
+        Generates the loader options that load all relations that are
+        required to generate UpdateWrapper objects for media list items.
+        Every relationship is loaded exactly once:
+        The many-to-one relations are joined into the query that loads the
+        list items, the collections of the media items are loaded with one
+        subquery each.
+        selectinload can't be used here, since SQLAlchemy 1.3 binds the
+        composite primary keys that contain Enum columns incorrectly.
+        :param list_items: The loader path to the media list items.
+                           If not specified, the options are generated for
+                           queries that load MediaListItem objects directly.
+        :return: The loader options
+        """
+        if list_items is None:
+            user_state = joinedload(MediaListItem.user_state)
+        else:
+            user_state = list_items.joinedload(MediaListItem.user_state)
+        media_item = user_state.joinedload(MediaUserState.media_item)
+        return [
+            media_item.joinedload(MediaItem.chapter_guess),
+            media_item.subqueryload(MediaItem.id_mappings),
+            media_item.subqueryload(MediaItem.ln_releases)
+        ]
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import sys
+import time
+import calendar
+import argparse
+from typing import Callable, List
+from bs4 import BeautifulSoup
+from otaku_info.utils.html import HTML_PARSER
+from otaku_info.external.reddit import parse_ln_releases
+from otaku_info.external.entities.RedditLnRelease import RedditLnRelease
+
+URL = "https://old.reddit.com/r/LightNovels/wiki/2019releases"
+
+
+def generate_page(rows: int) -> str:
+    """
+    Generates a page that resembles a reddit LN release wiki page
+    :param rows: The amount of releases per month
+    :return: The page
+    """
+    noise = "".join(
+        f"<div class='entry'><a href='/r/{i}'>Link {i}</a>"
+        f"<p>Some <em>text</em> {i}</p></div>"
+        for i in range(2000)
+    )
+    sidebar = "<table><tbody><tr><td>Sidebar</td></tr></tbody></table>"
+    months = ""
+    for month in range(1, 13):
+        months += f"<h3>Month {month}</h3><table><tbody>"
+        for i in range(rows):
+            months += \
+                f"<tr><td>{calendar.month_abbr[month]} {i % 28 + 1}</td>" \
+                f"<td><a href='/info/{i}'>Series {i}</a></td>" \
+                f"<td>{i}</td>" \
+                f"<td><a href='/buy/{i}'>Publisher</a></td>" \
+                f"<td>Digital, Physical</td></tr>"
+        months += "</tbody></table>"
+    return f"<html><body>{noise}{sidebar * 2}{months}{sidebar}" \
+           f"{noise}</body></html>"
+
+
+def parse_builtin(body: str) -> List[RedditLnRelease]:
+    """
+    Parses the releases like before the introduction of the parser layer:
+    The complete page is parsed using html.parser
+    :param body: The page
+    :return: The releases
+    """
+    soup = BeautifulSoup(body, "html.parser")
+    return [
+        RedditLnRelease.from_parts(2019, row.find_all("td"))
+        for table in soup.find_all("tbody")[2:-1]
+        for row in table.find_all("tr")
+    ]
+
+
+def benchmark(name: str, function: Callable[[], List], runs: int):
+    """
+    Runs a function multiple times and prints the average duration
+    :param name: The name of the benchmark
+    :param function: The function to benchmark
+    :param runs: The amount of runs
+    :return: None
+    """
+    start = time.perf_counter()
+    for _ in range(runs):
+        result = function()
+    duration = (time.perf_counter() - start) / runs
+    print(f"{name:<30} {duration * 1000:8.1f} ms ({len(result)} releases)")
+
+
+def main():
+    """
+    Compares the performance of the available parsing approaches
+    :return: None
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--file", help="A saved wiki page to parse instead "
+                                       "of a generated one")
+    parser.add_argument("--rows", type=int, default=150,
+                        help="The amount of generated releases per month")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.file is None:
+        body = generate_page(args.rows)
+    else:
+        with open(args.file, "r") as f:
+            body = f.read()
+
+    print(f"Page size: {len(body)} characters, parser: {HTML_PARSER}")
+    benchmark("html.parser, full tree",
+              lambda: parse_builtin(body), args.runs)
+    benchmark(f"{HTML_PARSER}, tbody only",
+              lambda: parse_ln_releases(2019, URL, body), args.runs)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+"""LICENSE
+Copyright 2020 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of otaku-info.
+
+otaku-info is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+otaku-info is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with otaku-info.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+from datetime import datetime
+from typing import Callable, List
+from sqlalchemy import event
+from jerrycan.base import app, db
+from jerrycan.initialize import init_flask
+from jerrycan.db.User import User
+from otaku_info import root_path
+from otaku_info.Config import Config
+from otaku_info.routes import blueprint_generators
+from otaku_info.db import models
+from otaku_info.db.MediaItem import MediaItem
+from otaku_info.db.MediaList import MediaList
+from otaku_info.db.MediaListItem import MediaListItem
+from otaku_info.db.MediaUserState import MediaUserState
+from otaku_info.db.MediaIdMapping import MediaIdMapping
+from otaku_info.db.MangaChapterGuess import MangaChapterGuess
+from otaku_info.db.LnRelease import LnRelease
+from otaku_info.enums import ListService, MediaType, MediaSubType, \
+    ReleasingState, ConsumingState
+from otaku_info.wrappers.UpdateWrapper import UpdateWrapper
+
+
+def generate_list(user: User, size: int):
+    """
+    Generates a manga list containing manga and light novels,
+    including chapter guesses, ID mappings and light novel releases
+    :param user: The user that owns the list
+    :param size: The amount of items in the list
+    :return: None
+    """
+    keys = {
+        "service": ListService.ANILIST,
+        "media_type": MediaType.MANGA
+    }
+    items, states, list_items, mappings, guesses, releases = \
+        [], [], [], [], [], []
+    for i in range(size):
+        service_id = str(i)
+        novel = i % 5 == 0
+        items.append(dict(
+            service_id=service_id,
+            media_subtype=MediaSubType.NOVEL if novel
+            else MediaSubType.MANGA,
+            romaji_title=f"Title {i}",
+            cover_url="",
+            latest_release=i % 300,
+            latest_volume_release=i % 30,
+            releasing_state=ReleasingState.RELEASING,
+            **keys
+        ))
+        states.append(dict(
+            service_id=service_id,
+            user_id=user.id,
+            progress=i % 200,
+            volume_progress=i % 20,
+            score=i % 100,
+            consuming_state=ConsumingState.CURRENT,
+            **keys
+        ))
+        list_items.append(dict(
+            media_list_service=ListService.ANILIST,
+            media_list_media_type=MediaType.MANGA,
+            media_list_user_id=user.id,
+            media_list_name="Reading",
+            user_state_service=ListService.ANILIST,
+            user_state_media_type=MediaType.MANGA,
+            user_state_user_id=user.id,
+            user_state_service_id=service_id
+        ))
+        for service in [ListService.MYANIMELIST, ListService.MANGADEX]:
+            mappings.append(dict(
+                parent_service=ListService.ANILIST,
+                parent_service_id=service_id,
+                media_type=MediaType.MANGA,
+                service=service,
+                service_id=service_id
+            ))
+        if novel:
+            for volume in range(1, 4):
+                releases.append(dict(
+                    series_name=f"Title {i}",
+                    volume=str(volume),
+                    volume_number=volume,
+                    digital=True,
+                    physical=False,
+                    release_date_string="2020-01-01",
+                    release_date=datetime(2020, 1, 1),
+                    service=ListService.ANILIST,
+                    service_id=service_id,
+                    media_type=MediaType.MANGA
+                ))
+        else:
+            guesses.append(dict(service_id=service_id, guess=i % 250, **keys))
+
+    db.session.add(MediaList(
+        user_id=user.id, name="Reading", **keys
+    ))
+    for model, rows in [
+        (MediaItem, items),
+        (MediaUserState, states),
+        (MediaListItem, list_items),
+        (MediaIdMapping, mappings),
+        (MangaChapterGuess, guesses),
+        (LnRelease, releases)
+    ]:
+        db.session.bulk_insert_mappings(model, rows)
+    db.session.commit()
+
+
+def load_legacy(user: User) -> List[MediaList]:
+    """
+    Loads the media list using the loader options that UpdateWrapper.from_db
+    used before the introduction of UpdateWrapper.build_query
+    :param user: The user that owns the list
+    :return: The media lists
+    """
+    return MediaList.query.filter_by(
+        user=user,
+        name="Reading",
+        service=ListService.ANILIST,
+        media_type=MediaType.MANGA
+    ).options(
+        db.joinedload(MediaList.list_items)
+          .subqueryload(MediaListItem.user_state)
+          .subqueryload(MediaUserState.media_item)
+          .subqueryload(MediaItem.chapter_guess)
+    ).options(
+        db.joinedload(MediaList.list_items)
+          .subqueryload(MediaListItem.user_state)
+          .subqueryload(MediaUserState.media_item)
+          .subqueryload(MediaItem.id_mappings)
+    ).options(
+        db.joinedload(MediaList.list_items)
+          .subqueryload(MediaListItem.user_state)
+          .subqueryload(MediaUserState.media_item)
+          .subqueryload(MediaItem.ln_releases)
+    ).all()
+
+
+def load_builder(user: User) -> List[MediaList]:
+    """
+    Loads the media list using UpdateWrapper.build_query
+    :param user: The user that owns the list
+    :return: The media lists
+    """
+    return UpdateWrapper.build_query(
+        user, "Reading", ListService.ANILIST, MediaType.MANGA
+    ).all()
+
+
+def benchmark(
+        name: str,
+        function: Callable[[User], List[MediaList]],
+        user_id: int,
+        runs: int
+):
+    """
+    Loads the media list and wraps its items multiple times and prints the
+    average duration and the amount of executed SQL statements
+    :param name: The name of the benchmark
+    :param function: The function that loads the media list
+    :param user_id: The ID of the user that owns the list
+    :param runs: The amount of runs
+    :return: None
+    """
+    statements = []
+
+    def count_statement(*_, **__):
+        """
+        Counts an executed SQL statement
+        :return: None
+        """
+        statements.append(1)
+
+    duration = 0.0
+    for _ in range(runs):
+        db.session.expunge_all()
+        user = User.query.get(user_id)
+        event.listen(db.engine, "before_cursor_execute", count_statement)
+        start = time.perf_counter()
+        updates = UpdateWrapper.from_media_lists(
+            function(user), None, 0, True
+        )
+        duration += time.perf_counter() - start
+        event.remove(db.engine, "before_cursor_execute", count_statement)
+    print(f"{name:<20} {duration / runs * 1000:8.1f} ms "
+          f"{len(statements) / runs:6.1f} statements "
+          f"({len(updates)} updates)")
+
+
+def main():
+    """
+    Compares the performance of the previous and the current loader of
+    UpdateWrapper.from_db using a synthetic media list
+    :return: None
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=5000,
+                        help="The amount of items in the media list")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    db_file.close()
+    os.environ["DB_MODE"] = "sqlite"
+    os.environ["SQLITE_PATH"] = db_file.name
+    for key in ["FLASK_SECRET", "RECAPTCHA_SITE_KEY", "RECAPTCHA_SECRET_KEY",
+                "SMTP_HOST", "SMTP_ADDRESS", "SMTP_PASSWORD",
+                "TELEGRAM_API_KEY"]:
+        os.environ.setdefault(key, "benchmark")
+    os.environ.setdefault("SMTP_PORT", "0")
+
+    try:
+        init_flask(
+            "otaku_info", "", root_path, Config, models, blueprint_generators
+        )
+        with app.app_context():
+            user = User(
+                username="benchmark",
+                email="benchmark@example.com",
+                password_hash="",
+                confirmation_hash="",
+                confirmed=True
+            )
+            db.session.add(user)
+            db.session.commit()
+            generate_list(user, args.items)
+
+            benchmark("Legacy loader", load_legacy, user.id, args.runs)
+            benchmark("Query builder", load_builder, user.id, args.runs)
+    finally:
+        os.remove(db_file.name)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -72,6 +72,9 @@ if __name__ == "__main__":
             "beautifulsoup4",
             "jerrycan"
         ],
+        extras_require={
+            "lxml": ["lxml"]
+        },
         include_package_data=True,
         zip_safe=False
     )